@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def temporary_files():
+    '''
+    py.test does not use TEST_RUNNER, files written by the app go to
+    a temporary directory the same way
+    '''
+    from core.test_runner import temporary_files
+
+    with temporary_files():
+        yield
@@ -0,0 +1,29 @@
+from django.contrib import admin
+
+from .models import Job, SlowQuery
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'priority', 'attempts',
+                    'run_at', 'created',)
+    list_filter = ('status', 'name',)
+    search_fields = ('name', 'payload',)
+
+
+admin.site.register(Job, JobAdmin)
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('sql', 'view', 'count', 'total_time', 'max_time',
+                    'last_seen',)
+    list_filter = ('view',)
+    search_fields = ('sql', 'frame',)
+    readonly_fields = ('fingerprint', 'sql', 'params', 'view', 'frame',
+                       'plan', 'count', 'total_time', 'max_time',
+                       'last_seen',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -0,0 +1,63 @@
+import re
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics, tracing
+
+FRAGMENT_RE = re.compile(r'^template\.cache\.[^.]+')
+_missing = object()
+
+
+def key_prefix(key):
+    '''
+    Metric label of the key: 'follow_graph:followees:1' -> 'follow_graph',
+    fragment cache keys are labeled with the fragment name, keys of unknown
+    shape with 'other', so ids and hashes never become labels
+    '''
+    key = str(key)
+    fragment = FRAGMENT_RE.match(key)
+    if fragment:
+        return fragment.group()
+    if '||' in key:
+        # sorl-thumbnail: 'sorl-thumbnail||image||<hash>'
+        return '||'.join(key.split('||', 2)[:2])
+    if ':' in key:
+        return key.split(':', 1)[0]
+    return 'other'
+
+
+class InstrumentedCacheMixin:
+    '''
+    Count cache hits and misses per key prefix and trace cache calls,
+    get_many, get_or_set and the like go through get
+    '''
+    def get(self, key, default=None, version=None):
+        with tracing.span('cache', f'get {key}'):
+            value = super().get(key, _missing, version)
+        if value is _missing:
+            metrics.inc('cache_misses_total', prefix=key_prefix(key))
+            return default
+        metrics.inc('cache_hits_total', prefix=key_prefix(key))
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with tracing.span('cache', f'set {key}'):
+            return super().set(key, value, timeout, version)
+
+    def delete(self, key, version=None):
+        with tracing.span('cache', f'delete {key}'):
+            return super().delete(key, version)
+
+    def incr(self, key, delta=1, version=None):
+        with tracing.span('cache', f'incr {key}'):
+            return super().incr(key, delta, version)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, FileBasedCache):
+    pass
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+CACHE_KEY = 'health:ping'
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def check_cache():
+    # default LocMem lives in the process, probe the cache shared by workers
+    cache = caches['shared']
+    cache.set(CACHE_KEY, 1, 10)
+    if cache.get(CACHE_KEY) != 1:
+        raise RuntimeError('cache round trip failed')
+
+
+def check_media():
+    # storage creates missing directories, so check the nearest existing one
+    path = settings.MEDIA_ROOT
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+    if not os.path.isdir(path) or not os.access(path, os.W_OK):
+        raise RuntimeError('MEDIA_ROOT is not writable')
+
+
+CHECKS = (
+    ('database', check_database),
+    ('cache', check_cache),
+    ('media', check_media),
+)
+
+
+def readiness():
+    '''
+    Run dependency checks, return (all ok, {name: {ok, latency_ms}})
+    '''
+    results = {}
+    for name, check in CHECKS:
+        started = time.perf_counter()
+        try:
+            check()
+            result = {'ok': True}
+        except Exception as error:
+            result = {'ok': False, 'error': str(error)}
+        result['latency_ms'] = round(
+            (time.perf_counter() - started) * 1000, 3
+        )
+        results[name] = result
+    return all(result['ok'] for result in results.values()), results
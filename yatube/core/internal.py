@@ -0,0 +1,33 @@
+import hmac
+
+from django.conf import settings
+
+
+def client_ip(request):
+    '''
+    Address of the client: behind proxies from TRUSTED_PROXIES it is
+    the last X-Forwarded-For entry not added by a trusted proxy,
+    None when a proxy did not pass the address
+    '''
+    hops = [request.META.get('REMOTE_ADDR')]
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        hops += [hop.strip() for hop in reversed(forwarded.split(','))]
+    for address in hops:
+        if address not in settings.TRUSTED_PROXIES:
+            return address or None
+    # клиент на одном хосте с прокси
+    return hops[-1] if forwarded else None
+
+
+def is_internal(request):
+    '''
+    Request from INTERNAL_IPS or with 'Authorization: Bearer <INTERNAL_TOKEN>'
+    '''
+    if client_ip(request) in settings.INTERNAL_IPS:
+        return True
+    token = settings.INTERNAL_TOKEN
+    return bool(token) and hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode(),
+        f'Bearer {token}'.encode(),
+    )
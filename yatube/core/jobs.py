@@ -0,0 +1,145 @@
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(name, batch=False):
+    '''
+    Register job handler. Batch handlers get list of payloads
+    of the same job type, other handlers get one payload
+    '''
+    def decorator(func):
+        _handlers[name] = (func, batch)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, priority=0, delay=0, max_attempts=None):
+    return Job.objects.create(
+        name=name,
+        payload=json.dumps(payload or {}),
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def release_stale():
+    '''
+    Return jobs of crashed workers to the queue
+    '''
+    deadline = timezone.now() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=deadline,
+    ).update(status=Job.PENDING, locked_by='', locked_at=None)
+
+
+def _lock(worker, pending):
+    first = (
+        pending
+        .order_by('-priority', 'run_at')
+        .values('id', 'name')
+        .first()
+    )
+    if first is None:
+        return None, []
+    _, batch = _handlers.get(first['name'], (None, False))
+    ids = [first['id']]
+    if batch:
+        ids += list(
+            pending
+            .filter(name=first['name'])
+            .exclude(id=first['id'])
+            .order_by('-priority', 'run_at')
+            .values_list('id', flat=True)[:settings.JOB_BATCH_SIZE - 1]
+        )
+    token = f'{worker}:{uuid.uuid4().hex[:16]}'
+    Job.objects.filter(id__in=ids, status=Job.PENDING).update(
+        status=Job.RUNNING,
+        locked_by=token,
+        locked_at=timezone.now(),
+    )
+    return first['name'], list(Job.objects.filter(locked_by=token))
+
+
+def claim(worker):
+    '''
+    Lock the most urgent job and, for batch handlers,
+    other due jobs of the same type
+    '''
+    pending = Job.objects.filter(
+        status=Job.PENDING,
+        run_at__lte=timezone.now(),
+    )
+    while True:
+        name, jobs = _lock(worker, pending)
+        # пустой список: задачи между выборкой и блокировкой забрал
+        # другой обработчик, берутся следующие
+        if name is None or jobs:
+            return name, jobs
+
+
+def _fail(jobs, error):
+    for job in jobs:
+        job.attempts += 1
+        job.last_error = error
+        job.locked_by = ''
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            )
+    Job.objects.bulk_update(
+        jobs,
+        ('attempts', 'last_error', 'locked_by', 'locked_at', 'status',
+         'run_at'),
+    )
+
+
+def run(name, jobs):
+    if name not in _handlers:
+        _fail(jobs, f'Неизвестный тип задачи {name}')
+        return
+    func, batch = _handlers[name]
+    payloads = [json.loads(job.payload) for job in jobs]
+    try:
+        with transaction.atomic():
+            if batch:
+                func(payloads)
+            else:
+                func(**payloads[0])
+    except Exception:
+        logger.exception('job %s failed', name)
+        _fail(jobs, traceback.format_exc())
+        return
+    Job.objects.filter(id__in=[job.id for job in jobs]).delete()
+
+
+def run_pending(worker='inline', max_jobs=None):
+    '''
+    Run due jobs until the queue is empty, return number of processed jobs
+    '''
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        name, jobs = claim(worker)
+        if name is None:
+            break
+        run(name, jobs)
+        processed += len(jobs)
+    return processed
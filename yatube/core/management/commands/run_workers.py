@@ -0,0 +1,71 @@
+import logging
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+logger = logging.getLogger(__name__)
+
+
+def work(worker, stop, poll_interval):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while not stop.is_set():
+        try:
+            if not jobs.run_pending(worker):
+                jobs.release_stale()
+                stop.wait(poll_interval)
+        except Exception:
+            # database is locked и другие сбои базы не должны останавливать
+            # обработчик, соединение открывается заново
+            logger.exception('worker %s failed', worker)
+            connections.close_all()
+            stop.wait(poll_interval)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOB_WORKERS,
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Обработать очередь в текущем процессе и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            jobs.release_stale()
+            processed = jobs.run_pending()
+            self.stdout.write(f'Выполнено задач: {processed}')
+            return
+
+        stop = multiprocessing.Event()
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=work,
+                args=(f'worker-{i}', stop, settings.JOB_POLL_INTERVAL),
+                daemon=True,
+            ) for i in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        self.stdout.write(f'Запущено обработчиков: {len(processes)}')
+        for process in processes:
+            process.join()
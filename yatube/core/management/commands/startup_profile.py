@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.startup import parse_importtime
+
+
+class Command(BaseCommand):
+    help = 'Report import time per module and per app ready() at cold start'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', default='yatube.wsgi')
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        process = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime', '-c',
+                'from core.startup import profile; '
+                f'profile({options["target"]!r})',
+            ],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report = json.loads(process.stdout)
+        modules = sorted(
+            parse_importtime(process.stderr.splitlines()),
+            key=lambda row: row[2],
+            reverse=True,
+        )
+        self.stdout.write(
+            f'Холодный старт {options["target"]}: '
+            f'{report["total"] * 1000:.1f} мс, '
+            f'URLconf при первом запросе: {report["urlconf"] * 1000:.1f} мс'
+        )
+        self.stdout.write('\nready() приложений, мс:')
+        for label, seconds in sorted(
+            report['ready'].items(),
+            key=lambda item: item[1],
+            reverse=True,
+        ):
+            self.stdout.write(f'{seconds * 1000:10.1f}  {label}')
+        self.stdout.write('\nИмпорт модулей, мс (всего / свое):')
+        for module, own, cumulative, depth in modules[:options['top']]:
+            self.stdout.write(
+                f'{cumulative / 1000:10.1f} {own / 1000:8.1f}  '
+                f'{"  " * depth}{module}'
+            )
@@ -0,0 +1,191 @@
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_last_flush = 0.0
+_pruned = False
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _reset():
+    global _last_flush, _pruned
+    _counters.clear()
+    _histograms.clear()
+    _last_flush = 0.0
+    _pruned = False
+
+
+# дочерний процесс не должен повторно отдать счетчики родителя
+os.register_at_fork(after_in_child=_reset)
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush > settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def inc(name, amount=1, **labels):
+    with _lock:
+        _counters[_key(name, labels)] += amount
+    _maybe_flush()
+
+
+def observe(name, value, **labels):
+    '''
+    Add value to the histogram of the metric
+    '''
+    buckets = settings.METRICS_BUCKETS
+    with _lock:
+        key = _key(name, labels)
+        if key not in _histograms:
+            _histograms[key] = [[0] * len(buckets), 0.0, 0]
+        histogram = _histograms[key]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                histogram[0][index] += 1
+                break
+        histogram[1] += value
+        histogram[2] += 1
+    _maybe_flush()
+
+
+def _path(pid):
+    return os.path.join(settings.METRICS_DIR, f'{pid}.json')
+
+
+def _running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # процесс есть, но принадлежит другому пользователю
+        return True
+    return True
+
+
+def prune():
+    '''
+    Remove files of processes which are no longer running
+    '''
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json*')):
+        pid = os.path.basename(path).split('.')[0]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        if not _running(int(pid)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def flush():
+    '''
+    Write metrics of this process to its own file in METRICS_DIR,
+    the first flush of a process removes files of finished ones
+    '''
+    global _last_flush, _pruned
+    with _lock:
+        data = {
+            'counters': [
+                [name, labels, value]
+                for (name, labels), value in _counters.items()
+            ],
+            'histograms': [
+                [name, labels, counts[:], total, count]
+                for (name, labels), (counts, total, count)
+                in _histograms.items()
+            ],
+        }
+        _last_flush = time.monotonic()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    if not _pruned:
+        _pruned = True
+        prune()
+    path = _path(os.getpid())
+    with open(path + '.tmp', 'w') as metrics_file:
+        json.dump(data, metrics_file)
+    os.replace(path + '.tmp', path)
+
+
+def collect():
+    '''
+    Merge metrics of all processes which share METRICS_DIR
+    '''
+    flush()
+    counters = defaultdict(float)
+    histograms = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        try:
+            with open(path) as metrics_file:
+                data = json.load(metrics_file)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in data['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, counts, total, count in data['histograms']:
+            key = name, tuple(map(tuple, labels))
+            if key not in histograms:
+                histograms[key] = [[0] * len(counts), 0.0, 0]
+            merged = histograms[key]
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return {'counters': dict(counters), 'histograms': histograms}
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def exposition():
+    '''
+    Render merged metrics in Prometheus text format
+    '''
+    metrics = collect()
+    lines = []
+    typed = set()
+    for (name, labels), value in sorted(metrics['counters'].items()):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name}{_labels(labels)} {value}')
+    buckets = settings.METRICS_BUCKETS
+    for (name, labels), (counts, total, count) in sorted(
+        metrics['histograms'].items()
+    ):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for bound, bucket_count in zip(buckets, counts):
+            cumulative += bucket_count
+            lines.append(
+                f'{name}_bucket{_labels(labels, [("le", bound)])} '
+                f'{cumulative}'
+            )
+        lines.append(
+            f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {count}'
+        )
+        lines.append(f'{name}_sum{_labels(labels)} {total}')
+        lines.append(f'{name}_count{_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,251 @@
+import random
+import time
+import zlib
+
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import health, metrics, nplusone, slow_queries, tracing
+from .internal import is_internal
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _compressor(encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(
+            quality=settings.COMPRESS_BROTLI_QUALITY
+        )
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(
+        settings.COMPRESS_LEVEL,
+        zlib.DEFLATED,
+        GZIP_WBITS,
+    )
+    return (
+        compressor.compress,
+        lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+        compressor.flush,
+    )
+
+
+def _report(encoding, original, compressed, cpu_time):
+    metrics.observe('response_compression_seconds', cpu_time,
+                    encoding=encoding)
+    if original:
+        metrics.observe('response_compression_ratio', compressed / original,
+                        encoding=encoding)
+
+
+def _compress(encoding, content):
+    process, _, finish = _compressor(encoding)
+    started = time.thread_time()
+    compressed = process(content) + finish()
+    _report(encoding, len(content), len(compressed),
+            time.thread_time() - started)
+    return compressed
+
+
+def _compress_stream(encoding, chunks):
+    process, flush, finish = _compressor(encoding)
+    original = compressed = 0
+    cpu_time = 0.0
+    for chunk in chunks:
+        started = time.thread_time()
+        data = process(chunk) + flush()
+        cpu_time += time.thread_time() - started
+        original += len(chunk)
+        compressed += len(data)
+        if data:
+            yield data
+    started = time.thread_time()
+    data = finish()
+    cpu_time += time.thread_time() - started
+    compressed += len(data)
+    _report(encoding, original, compressed, cpu_time)
+    yield data
+
+
+def _compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code != 200:
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    if content_type in settings.COMPRESS_CONTENT_TYPES:
+        return True
+    return content_type.startswith('text/')
+
+
+def _accepted_encoding(request):
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    '''
+    Gzip or brotli compression of text responses, streaming responses
+    are compressed chunk by chunk
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not _compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = _accepted_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = _compress_stream(
+                encoding,
+                response.streaming_content,
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESS_MIN_SIZE:
+                return response
+            compressed = _compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class HealthCheckMiddleware:
+    '''
+    Answer liveness and readiness probes before sessions, auth and CSRF,
+    must be the first middleware
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == settings.HEALTHZ_PATH:
+            return JsonResponse({'status': 'ok'})
+        if request.path == settings.READYZ_PATH:
+            ready, checks = health.readiness()
+            return JsonResponse(
+                {'status': 'ok' if ready else 'fail', 'checks': checks},
+                status=200 if ready else 503,
+            )
+        return self.get_response(request)
+
+
+class MetricsMiddleware:
+    '''
+    Request latency per URL name and status, number and time of DB queries
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def timed_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(timed_query):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.observe('http_request_duration_seconds', duration,
+                        view=view, status=response.status_code)
+        metrics.inc('db_queries_total', len(queries), view=view)
+        metrics.observe('db_query_duration_seconds', sum(queries), view=view)
+        return response
+
+
+class SlowQueryMiddleware:
+    '''
+    Log queries slower than SLOW_QUERY_THRESHOLD with EXPLAIN output
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        def view_name():
+            match = request.resolver_match
+            return match.view_name if match else request.path
+
+        wrapper = slow_queries.logging_wrapper(view_name)
+        with connection.execute_wrapper(wrapper):
+            return self.get_response(request)
+
+
+class TracingMiddleware:
+    '''
+    Trace spans of the request, add Server-Timing header for internal
+    addresses and export sampled traces
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trace = tracing.start(
+            random.random() < settings.TRACING_SAMPLE_RATE
+        )
+        try:
+            with connection.execute_wrapper(tracing.sql_wrapper):
+                with tracing.span('app', request.path):
+                    response = self.get_response(request)
+        finally:
+            tracing.finish()
+        if settings.TRACING_SERVER_TIMING and is_internal(request):
+            response['Server-Timing'] = trace.server_timing()
+        if trace.sampled:
+            match = request.resolver_match
+            tracing.export(
+                trace,
+                method=request.method,
+                path=request.path,
+                view=match.view_name if match else None,
+                status=response.status_code,
+                time=time.time(),
+            )
+        return response
+
+
+class NPlusOneMiddleware:
+    '''
+    Detect queries repeated more than NPLUSONE_THRESHOLD times in a request,
+    NPLUSONE_MODE is 'log', 'raise' or None to turn detection off
+    '''
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.NPLUSONE_MODE:
+            return self.get_response(request)
+
+        def view_name():
+            match = request.resolver_match
+            return match.view_name if match else request.path
+
+        with connection.execute_wrapper(nplusone.Detector(view_name)):
+            return self.get_response(request)
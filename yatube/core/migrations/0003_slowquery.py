@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True, verbose_name='Отпечаток')),
+                ('sql', models.TextField(verbose_name='Нормализованный SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Параметры последнего запроса')),
+                ('view', models.CharField(blank=True, max_length=200, verbose_name='View')),
+                ('frame', models.CharField(blank=True, max_length=500, verbose_name='Место вызова')),
+                ('plan', models.TextField(blank=True, verbose_name='План запроса')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Количество')),
+                ('total_time', models.FloatField(verbose_name='Суммарное время, с')),
+                ('max_time', models.FloatField(verbose_name='Максимальное время, с')),
+                ('last_seen', models.DateTimeField(verbose_name='Последний раз')),
+            ],
+            options={
+                'ordering': ('-total_time',),
+            },
+        ),
+    ]
@@ -0,0 +1,145 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    verbose_name = 'Файл'
+    verbose_name_plural = 'Файлы'
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Имя файла',
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        verbose_name='SHA-256',
+    )
+    size = models.PositiveIntegerField(
+        verbose_name='Размер в байтах',
+    )
+    references = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество ссылок',
+    )
+
+    def __str__(self):
+        return self.name
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+    verbose_name = 'Задача'
+    verbose_name_plural = 'Задачи'
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Тип задачи',
+    )
+    payload = models.TextField(
+        default='{}',
+        verbose_name='Параметры в JSON',
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        verbose_name='Максимум попыток',
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить не раньше',
+    )
+    locked_by = models.CharField(
+        max_length=64,
+        blank=True,
+        verbose_name='Обработчик',
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='job_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class SlowQuery(models.Model):
+    verbose_name = 'Медленный запрос'
+    verbose_name_plural = 'Медленные запросы'
+    fingerprint = models.CharField(
+        max_length=40,
+        unique=True,
+        verbose_name='Отпечаток',
+    )
+    sql = models.TextField(
+        verbose_name='Нормализованный SQL',
+    )
+    params = models.TextField(
+        blank=True,
+        verbose_name='Параметры последнего запроса',
+    )
+    view = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='View',
+    )
+    frame = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name='Место вызова',
+    )
+    plan = models.TextField(
+        blank=True,
+        verbose_name='План запроса',
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Количество',
+    )
+    total_time = models.FloatField(
+        verbose_name='Суммарное время, с',
+    )
+    max_time = models.FloatField(
+        verbose_name='Максимальное время, с',
+    )
+    last_seen = models.DateTimeField(
+        verbose_name='Последний раз',
+    )
+
+    class Meta:
+        ordering = ('-total_time',)
+
+    def __str__(self):
+        return self.sql[:100]
@@ -0,0 +1,67 @@
+import logging
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+from . import slow_queries
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def template_location():
+    '''
+    Return 'template:line' of the innermost template node being rendered
+    '''
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                name = origin.template_name or origin.name
+                return f'{name}:{token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+class Detector:
+    '''
+    Count query fingerprints and report each one repeated more than
+    NPLUSONE_THRESHOLD times once
+    '''
+    def __init__(self, where, mode=None):
+        self.where = where
+        self.mode = mode or settings.NPLUSONE_MODE
+        self.counts = Counter()
+        self.reported = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        if not slow_queries.is_reporting():
+            self.check(sql)
+        return execute(sql, params, many, context)
+
+    def check(self, sql):
+        normalized_sql = slow_queries.normalize(sql)
+        self.counts[normalized_sql] += 1
+        if (self.counts[normalized_sql] <= settings.NPLUSONE_THRESHOLD
+                or normalized_sql in self.reported):
+            return
+        self.reported.add(normalized_sql)
+        location = template_location() or slow_queries.caller_frame()
+        message = (
+            f'N+1 in {self.where()}: query repeated more than '
+            f'{settings.NPLUSONE_THRESHOLD} times at {location}: '
+            f'{normalized_sql}'
+        )
+        if self.mode == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
@@ -0,0 +1,180 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDERS_RE = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+SPACES_RE = re.compile(r'\s+')
+PROJECT_DIR = settings.BASE_DIR + os.sep
+SKIPPED_MODULES = tuple(
+    os.path.join(PROJECT_DIR, 'core', module)
+    for module in ('slow_queries.py', 'nplusone.py', 'middleware.py')
+)
+
+_local = threading.local()
+
+
+def normalize(sql):
+    '''
+    Replace literals and lists of placeholders, so that queries which differ
+    only in parameters get the same text
+    '''
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDERS_RE.sub('(...)', sql)
+    return SPACES_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def caller_frame():
+    '''
+    Return 'path:line in function' of the innermost project frame
+    '''
+    for frame in reversed(traceback.extract_stack()):
+        if (frame.filename.startswith(PROJECT_DIR)
+                and frame.filename not in SKIPPED_MODULES):
+            path = os.path.relpath(frame.filename, PROJECT_DIR)
+            return f'{path}:{frame.lineno} in {frame.name}'
+    return ''
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    prefix = ('EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+              else 'EXPLAIN ')
+    try:
+        # ошибка EXPLAIN не должна ломать транзакцию запроса
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+    except Exception as error:
+        return f'EXPLAIN failed: {error}'
+
+
+def record(normalized_sql, params, view, frame, plan, duration):
+    '''
+    Update fingerprint in the top table, the fastest rows beyond
+    SLOW_QUERY_TOP are dropped
+    '''
+    key = fingerprint(normalized_sql)
+    now = timezone.now()
+    fields = {
+        'params': repr(params)[:1000],
+        'view': view,
+        'frame': frame[:500],
+        'plan': plan,
+        'last_seen': now,
+    }
+    updated = SlowQuery.objects.filter(fingerprint=key).update(
+        count=F('count') + 1,
+        total_time=F('total_time') + duration,
+        max_time=Greatest('max_time', duration),
+        **fields,
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                fingerprint=key,
+                sql=normalized_sql,
+                total_time=duration,
+                max_time=duration,
+                **fields,
+            )
+    except IntegrityError:
+        # Тот же запрос записал другой процесс
+        return
+    extra = list(
+        SlowQuery.objects
+        .values_list('pk', flat=True)[settings.SLOW_QUERY_TOP:]
+    )
+    if extra:
+        SlowQuery.objects.filter(pk__in=extra).delete()
+
+
+def is_reporting():
+    '''
+    True while queries of the slow query report itself are executed
+    '''
+    return getattr(_local, 'active', False)
+
+
+@contextmanager
+def _reporting(connection):
+    '''
+    Run queries of the report past metrics, tracing and other execute
+    wrappers of the request
+    '''
+    wrappers = connection.execute_wrappers
+    connection.execute_wrappers = []
+    _local.active = True
+    try:
+        yield
+    finally:
+        connection.execute_wrappers = wrappers
+        _local.active = False
+
+
+def logging_wrapper(view_name):
+    '''
+    Make execute wrapper which logs queries slower than
+    SLOW_QUERY_THRESHOLD, view_name is called to get the current view
+    '''
+    def wrapper(execute, sql, params, many, context):
+        if is_reporting():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        # запрос с ошибкой не попадает в отчет
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= settings.SLOW_QUERY_THRESHOLD:
+            _report(context['connection'], sql, params, many,
+                    view_name(), duration)
+        return result
+    return wrapper
+
+
+def _report(connection, sql, params, many, view, duration):
+    normalized_sql = normalize(sql)
+    frame = caller_frame()
+    with _reporting(connection):
+        plan = '' if many else explain(connection, sql, params)
+    logger.warning(
+        'slow query %.3fs in %s at %s: %s; params=%r\n%s',
+        duration, view, frame, normalized_sql, params, plan,
+    )
+
+    def save():
+        try:
+            with _reporting(connection):
+                record(normalized_sql, params, view, frame, plan, duration)
+        except Exception:
+            logger.exception('slow query was not recorded')
+
+    # запись в транзакции запроса откатилась бы вместе с ней
+    transaction.on_commit(save, using=connection.alias)
@@ -0,0 +1,59 @@
+import json
+import re
+import sys
+import time
+
+IMPORT_TIME_RE = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$'
+)
+
+
+def parse_importtime(lines):
+    '''
+    Parse python -X importtime output into
+    (module, self microseconds, cumulative microseconds, depth)
+    '''
+    for line in lines:
+        match = IMPORT_TIME_RE.match(line.rstrip('\n'))
+        if match:
+            own, cumulative, indent, module = match.groups()
+            yield module, int(own), int(cumulative), len(indent) // 2
+
+
+def profile(target='yatube.wsgi'):
+    '''
+    Import target and ROOT_URLCONF with every AppConfig.ready() timed,
+    print JSON report to stdout. Run in a fresh interpreter
+    with -X importtime to get per-module import times on stderr
+    '''
+    from django.apps import config
+
+    ready_times = {}
+    create = config.AppConfig.create.__func__
+
+    def timed_create(cls, entry):
+        app_config = create(cls, entry)
+        ready = app_config.ready
+
+        def timed_ready():
+            started = time.perf_counter()
+            ready()
+            ready_times[app_config.label] = time.perf_counter() - started
+
+        app_config.ready = timed_ready
+        return app_config
+
+    config.AppConfig.create = classmethod(timed_create)
+    started = time.perf_counter()
+    __import__(target)
+    total = time.perf_counter() - started
+
+    from django.conf import settings
+
+    started = time.perf_counter()
+    __import__(settings.ROOT_URLCONF)
+    urlconf = time.perf_counter() - started
+    json.dump(
+        {'total': total, 'urlconf': urlconf, 'ready': ready_times},
+        sys.stdout,
+    )
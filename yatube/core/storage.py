@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                StaticFilesStorage)
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import StoredFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+TEMP_DIR = 'tmp'
+CHUNK_SIZE = 64 * 1024
+
+
+def content_name(directory, sha256, extension):
+    return os.path.join(directory, sha256[:2], sha256 + extension)
+
+
+def file_sha256(file_):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def acquire(name, sha256, size, count=1):
+    '''
+    Add references to stored file, create record for a new one
+    '''
+    with transaction.atomic():
+        updated = (
+            StoredFile.objects
+            .filter(name=name)
+            .update(references=F('references') + count)
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(
+                    name=name,
+                    sha256=sha256,
+                    size=size,
+                    references=count,
+                )
+        except IntegrityError:
+            StoredFile.objects.filter(name=name).update(
+                references=F('references') + count
+            )
+
+
+def release(name):
+    '''
+    Drop one reference, return True when nobody refers to the file
+    '''
+    with transaction.atomic():
+        records = StoredFile.objects.filter(name=name)
+        records.filter(references__gt=0).update(
+            references=F('references') - 1
+        )
+        remaining = records.values_list('references', flat=True).first()
+        if remaining:
+            return False
+        records.delete()
+    return True
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    '''
+    Name files by SHA-256 of content, identical files are stored once
+    and deleted when the last reference is released
+    '''
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        descriptor, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            name = content_name(directory, sha256, extension)
+            full_path = self.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+                # новая ссылка заново отсчитывает MEDIA_GC_MIN_AGE,
+                # сборщик не удалит файл до сохранения поста
+                os.utime(full_path)
+            else:
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        acquire(name, sha256, size)
+        return name.replace('\\', '/')
+
+    def delete(self, name):
+        '''
+        Drop a reference, the file goes after commit of the transaction
+        which dropped the last one, a rollback keeps it with its record
+        '''
+        if release(name):
+            transaction.on_commit(lambda: self._delete_unreferenced(name))
+
+    def _delete_unreferenced(self, name):
+        # до фиксации тот же файл мог быть загружен заново
+        if StoredFile.objects.filter(name=name).exists():
+            return
+        try:
+            super().delete(name)
+        except (OSError, SuspiciousFileOperation):
+            # транзакция уже зафиксирована, оставшийся файл уберет media_gc
+            logger.exception('stored file %s was not deleted', name)
+
+
+def compress(data):
+    '''
+    Return {extension: compressed bytes} for variants smaller than data
+    '''
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    return {
+        extension: compressed for extension, compressed in variants.items()
+        if len(compressed) < len(data)
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    '''
+    Content-hashed static files with precompressed .gz and .br siblings
+    written by collectstatic
+    '''
+    manifest_strict = False
+
+    def url(self, name, force=False):
+        try:
+            return super().url(name, force)
+        except ValueError:
+            # collectstatic has not been run, e.g. in tests
+            return StaticFilesStorage.url(self, name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            if not name.endswith(settings.STATIC_COMPRESS_EXTENSIONS):
+                continue
+            with self.open(name) as static_file:
+                data = static_file.read()
+            for extension, compressed in compress(data).items():
+                if self.exists(name + extension):
+                    self.delete(name + extension)
+                self._save(name + extension, ContentFile(compressed))
@@ -0,0 +1,39 @@
+import copy
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def temporary_files():
+    '''
+    Keep files written by the app, metrics and the shared cache,
+    in a temporary directory
+    '''
+    temp_dir = tempfile.mkdtemp()
+    caches = copy.deepcopy(settings.CACHES)
+    caches['shared']['LOCATION'] = os.path.join(temp_dir, 'cache')
+    try:
+        with override_settings(METRICS_DIR=temp_dir, CACHES=caches):
+            yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    '''
+    Run tests with temporary_files, py.test gets it from conftest.py
+    '''
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.temp_files = temporary_files()
+        self.temp_files.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self.temp_files.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,70 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job
+
+calls = []
+
+
+@jobs.handler('tests.single')
+def single(value):
+    calls.append(('single', value))
+
+
+@jobs.handler('tests.batch', batch=True)
+def batch(payloads):
+    calls.append(('batch', sorted(payload['value'] for payload in payloads)))
+
+
+@jobs.handler('tests.broken')
+def broken():
+    raise RuntimeError('broken job')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_priority_order(self):
+        jobs.enqueue('tests.single', {'value': 'low'})
+        jobs.enqueue('tests.single', {'value': 'high'}, priority=5)
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(calls, [('single', 'high'), ('single', 'low')])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOB_BATCH_SIZE=2)
+    def test_same_type_jobs_are_batched(self):
+        for value in range(3):
+            jobs.enqueue('tests.batch', {'value': value})
+        jobs.run_pending()
+        self.assertEqual(calls, [('batch', [0, 1]), ('batch', [2])])
+
+    def test_delayed_job_waits(self):
+        jobs.enqueue('tests.single', {'value': 1}, delay=60)
+        self.assertEqual(jobs.run_pending(), 0)
+
+    @override_settings(JOB_RETRY_BACKOFF=10)
+    def test_retry_with_backoff_then_fail(self):
+        job = jobs.enqueue('tests.broken', max_attempts=2)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('broken job', job.last_error)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOB_LOCK_TIMEOUT=0)
+    def test_release_stale(self):
+        job = jobs.enqueue('tests.single', {'value': 1})
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            locked_at=timezone.now(),
+        )
+        self.assertEqual(jobs.release_stale(), 1)
+        self.assertEqual(jobs.run_pending(), 1)
@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+HASHED_NAME = 'posts/ab/' + 'ab' * 32 + '.gif'
+CONTENT = b'0123456789'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (HASHED_NAME, 'posts/plain.gif', 'tmp/upload'):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as media_file:
+                media_file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_serves_file_with_cache_headers(self):
+        response = self.client.get(settings.MEDIA_URL + HASHED_NAME)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/gif')
+        self.assertIn('immutable', response['Cache-Control'])
+        response = self.client.get(settings.MEDIA_URL + 'posts/plain.gif')
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_range_request(self):
+        response = self.client.get(
+            settings.MEDIA_URL + HASHED_NAME,
+            HTTP_RANGE='bytes=2-4',
+        )
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        response = self.client.get(
+            settings.MEDIA_URL + HASHED_NAME,
+            HTTP_RANGE='bytes=-3',
+        )
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+    def test_denied_paths(self):
+        for path in ('tmp/upload', '../manage.py', 'posts/missing.gif'):
+            with self.subTest(path=path):
+                response = self.client.get(settings.MEDIA_URL + path)
+                self.assertEqual(response.status_code, 404)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_accel_redirect(self):
+        response = self.client.get(settings.MEDIA_URL + HASHED_NAME)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + HASHED_NAME,
+        )
+        self.assertEqual(response.content, b'')
@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+from ..cache import key_prefix
+
+METRICS_DIR = tempfile.mkdtemp()
+# запрос с localhost через nginx
+INTERNAL = {'HTTP_X_FORWARDED_FOR': '127.0.0.1'}
+
+
+@override_settings(METRICS_DIR=METRICS_DIR)
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_merges_files_of_other_processes(self):
+        metrics.inc('test_jobs_total', 2, queue='default')
+        metrics.observe('test_duration_seconds', 0.02)
+        other = {
+            'counters': [['test_jobs_total', [['queue', 'default']], 3]],
+            'histograms': [['test_duration_seconds', [],
+                            [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0], 0.02, 1]],
+        }
+        with open(os.path.join(METRICS_DIR, '1.json'), 'w') as other_file:
+            json.dump(other, other_file)
+        collected = metrics.collect()
+        key = ('test_jobs_total', (('queue', 'default'),))
+        self.assertEqual(collected['counters'][key], 5)
+        counts, total, count = collected['histograms'][
+            ('test_duration_seconds', ())
+        ]
+        self.assertEqual(count, 2)
+        self.assertEqual(counts[2], 2)
+
+    def test_files_of_finished_processes_are_pruned(self):
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        finished = os.path.join(METRICS_DIR, f'{process.pid}.json')
+        running = os.path.join(METRICS_DIR, f'{os.getppid()}.json')
+        for path in (finished, running):
+            with open(path, 'w') as metrics_file:
+                json.dump({'counters': [], 'histograms': []}, metrics_file)
+        metrics._reset()
+        metrics.flush()
+        self.assertFalse(os.path.exists(finished))
+        self.assertTrue(os.path.exists(running))
+        self.assertTrue(os.path.exists(metrics._path(os.getpid())))
+
+    def test_exposition_format(self):
+        metrics.observe('test_latency_seconds', 0.3, view='posts:index')
+        text = metrics.exposition()
+        self.assertIn('# TYPE test_latency_seconds histogram', text)
+        self.assertIn(
+            'test_latency_seconds_bucket{view="posts:index",le="0.25"} 0',
+            text,
+        )
+        self.assertIn(
+            'test_latency_seconds_bucket{view="posts:index",le="0.5"} 1',
+            text,
+        )
+        self.assertIn('test_latency_seconds_count{view="posts:index"} 1',
+                      text)
+
+    def test_requests_db_and_cache_are_measured(self):
+        cache.clear()
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(reverse('metrics'), **INTERNAL)
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{status="200",view="posts:index"}',
+            text,
+        )
+        self.assertIn('db_queries_total{view="posts:index"}', text)
+        self.assertIn('cache_misses_total{prefix="template.cache.', text)
+
+    def test_shared_cache_is_measured(self):
+        shared = caches['shared']
+        shared.get('tests:shared')
+        shared.set('tests:shared', 1)
+        shared.get('tests:shared')
+        counters = metrics.collect()['counters']
+        for name in ('cache_misses_total', 'cache_hits_total'):
+            with self.subTest(name):
+                self.assertGreaterEqual(
+                    counters[(name, (('prefix', 'tests'),))], 1
+                )
+
+    def test_metrics_are_not_public(self):
+        url = reverse('metrics')
+        for name, headers in (
+            ('direct', {'REMOTE_ADDR': '203.0.113.5'}),
+            ('proxied', {'HTTP_X_FORWARDED_FOR': '203.0.113.5'}),
+            ('proxy without address', {}),
+            ('spoofed', {'HTTP_X_FORWARDED_FOR': '127.0.0.1, 203.0.113.5'}),
+        ):
+            with self.subTest(name):
+                self.assertEqual(self.client.get(url, **headers).status_code,
+                                 404)
+        self.assertEqual(self.client.get(url, **INTERNAL).status_code, 200)
+        external = {'REMOTE_ADDR': '203.0.113.5'}
+        with override_settings(INTERNAL_TOKEN='secret'):
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer bad',
+                                       **external)
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secret',
+                                       **external)
+            self.assertEqual(response.status_code, 200)
+
+    def test_key_prefix(self):
+        self.assertEqual(key_prefix('follow_graph:followees:1'),
+                         'follow_graph')
+        self.assertEqual(key_prefix('template.cache.index_page.abc'),
+                         'template.cache.index_page')
+        self.assertEqual(key_prefix('sorl-thumbnail||image||0a1b2c'),
+                         'sorl-thumbnail||image')
+        self.assertEqual(key_prefix('sorl-thumbnail||thumbnails||0a1b2c'),
+                         'sorl-thumbnail||thumbnails')
+        self.assertEqual(key_prefix('0a1b2c3d'), 'other')
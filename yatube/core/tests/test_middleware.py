@@ -0,0 +1,99 @@
+import copy
+import gzip
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from .. import metrics
+from ..middleware import CompressionMiddleware
+
+HTML = '<p>пост</p>' * 200
+
+
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, **headers):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', **headers))
+
+    def test_compresses_html(self):
+        response = self.process(
+            HttpResponse(HTML),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertIn(
+            ('response_compression_ratio', (('encoding', 'gzip'),)),
+            metrics.collect()['histograms'],
+        )
+
+    def test_compresses_streaming_chunk_by_chunk(self):
+        response = self.process(
+            StreamingHttpResponse(iter([HTML, HTML])),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(
+            gzip.decompress(b''.join(chunks)).decode(),
+            HTML * 2,
+        )
+
+    @override_settings(COMPRESS_MIN_SIZE=10 ** 6)
+    def test_skips_small_responses(self):
+        response = self.process(
+            HttpResponse(HTML),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_skips_compressed_content_types(self):
+        response = self.process(
+            HttpResponse(b'\x00' * 4096, content_type='image/jpeg'),
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.process(HttpResponse(HTML))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class HealthCheckTests(TestCase):
+    def test_healthz(self):
+        response = self.client.get('/healthz')
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_readyz_reports_latency(self):
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(set(checks), {'database', 'cache', 'media'})
+        for check in checks.values():
+            self.assertTrue(check['ok'])
+            self.assertIn('latency_ms', check)
+
+    def test_readyz_fails_without_media(self):
+        with override_settings(
+            MEDIA_ROOT=os.path.join(settings.BASE_DIR, 'manage.py', 'media')
+        ):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['checks']['media']['ok'])
+
+    def test_readyz_fails_without_shared_cache(self):
+        caches = copy.deepcopy(settings.CACHES)
+        caches['shared']['LOCATION'] = os.path.join(
+            settings.BASE_DIR, 'manage.py', 'cache'
+        )
+        with override_settings(CACHES=caches):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['checks']['cache']['ok'])
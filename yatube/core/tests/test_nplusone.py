@@ -0,0 +1,46 @@
+from django.db import connection
+from django.template import Context, Engine
+from django.test import TestCase, override_settings
+
+from posts.models import Post, User
+
+from ..nplusone import Detector, NPlusOneError
+
+
+@override_settings(NPLUSONE_THRESHOLD=2)
+class NPlusOneTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(4):
+            author = User.objects.create_user(username=f'author_{number}')
+            Post.objects.create(text='Пост', author=author)
+
+    def detector(self, mode):
+        return connection.execute_wrapper(
+            Detector(lambda: 'test', mode=mode)
+        )
+
+    def test_raises_with_python_frame(self):
+        with self.assertRaisesMessage(NPlusOneError,
+                                      'core/tests/test_nplusone.py'):
+            with self.detector('raise'):
+                for post in Post.objects.all():
+                    post.author.username
+
+    def test_logs_template_line(self):
+        template = Engine().from_string(
+            '{% for post in posts %}\n{{ post.author.username }}\n'
+            '{% endfor %}'
+        )
+        with self.assertLogs('core.nplusone', 'WARNING') as logs:
+            with self.detector('log'):
+                template.render(Context({'posts': Post.objects.all()}))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn(':2', logs.output[0])
+        self.assertIn('auth_user', logs.output[0])
+
+    def test_select_related_is_not_reported(self):
+        with self.detector('raise'):
+            for post in Post.objects.select_related('author'):
+                post.author.username
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import SlowQuery
+from ..slow_queries import logging_wrapper, normalize
+
+User = get_user_model()
+
+
+class SlowQueryTests(TransactionTestCase):
+    '''
+    Reports are recorded on commit, so tests run without
+    the test case transaction
+    '''
+    def setUp(self):
+        cache.clear()
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize("SELECT *  FROM t WHERE a IN (%s, %s, %s)\n"
+                      "AND b = 'x' LIMIT 10"),
+            'SELECT * FROM t WHERE a IN (...) AND b = ? LIMIT ?',
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_slow_queries_are_logged_with_plan(self):
+        user = User.objects.create_user(username='reader')
+        self.client.force_login(user)
+        with self.assertLogs('core.slow_queries', 'WARNING') as logs:
+            self.client.get(reverse('posts:follow_index'))
+        self.assertTrue(any('posts:follow_index' in line
+                            for line in logs.output))
+        query = SlowQuery.objects.filter(
+            view='posts:follow_index',
+            sql__contains='posts_follow',
+        ).first()
+        self.assertIsNotNone(query)
+        self.assertIn('posts/', query.frame)
+        self.assertTrue(query.plan)
+        self.assertGreaterEqual(query.max_time, 0)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0, SLOW_QUERY_TOP=3)
+    def test_keeps_only_top_fingerprints(self):
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            self.client.get(reverse('posts:index'))
+            self.client.get(reverse('posts:index'))
+        self.assertLessEqual(SlowQuery.objects.count(), 3)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_report_bypasses_other_wrappers(self):
+        queries = []
+
+        def counting(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with self.assertLogs('core.slow_queries', 'WARNING'), \
+                connection.execute_wrapper(counting), \
+                connection.execute_wrapper(logging_wrapper(lambda: 'test')):
+            User.objects.count()
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(SlowQuery.objects.filter(view='test').exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_failed_queries_are_not_reported(self):
+        with connection.execute_wrapper(logging_wrapper(lambda: 'test')):
+            with self.assertRaises(DatabaseError):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT * FROM missing_table')
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_recorded_on_commit(self):
+        with self.assertLogs('core.slow_queries', 'WARNING'):
+            with transaction.atomic():
+                with connection.execute_wrapper(
+                    logging_wrapper(lambda: 'test')
+                ):
+                    User.objects.count()
+                self.assertFalse(SlowQuery.objects.exists())
+        self.assertTrue(SlowQuery.objects.filter(view='test').exists())
@@ -0,0 +1,32 @@
+import io
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..startup import parse_importtime
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     posts.forms',
+            'import time:      5000 |      45126 | yatube.wsgi',
+        ]
+        self.assertEqual(
+            list(parse_importtime(lines)),
+            [('posts.forms', 120, 120, 2), ('yatube.wsgi', 5000, 45126, 0)],
+        )
+
+    def test_command_reports_apps_and_modules(self):
+        out = io.StringIO()
+        call_command('startup_profile', top=5, stdout=out)
+        report = out.getvalue()
+        self.assertIn('Холодный старт yatube.wsgi', report)
+        self.assertIn('posts', report)
+        self.assertIn('yatube.wsgi', report)
+
+    def test_pil_is_not_imported_on_start(self):
+        out = io.StringIO()
+        call_command('startup_profile', top=1000, stdout=out)
+        self.assertNotIn('PIL', out.getvalue())
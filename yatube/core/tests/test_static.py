@@ -0,0 +1,53 @@
+import gzip
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(STATIC_ROOT=TEMP_STATIC_ROOT)
+class PrecompressedStaticTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_name = staticfiles_storage.stored_name(
+            'css/bootstrap.min.css'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_collectstatic_writes_hashed_gzip_sibling(self):
+        self.assertNotEqual(
+            PrecompressedStaticTests.hashed_name,
+            'css/bootstrap.min.css',
+        )
+        self.assertTrue(staticfiles_storage.exists(
+            PrecompressedStaticTests.hashed_name + '.gz'
+        ))
+
+    def test_serves_precompressed_variant(self):
+        url = settings.STATIC_URL + PrecompressedStaticTests.hashed_name
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = gzip.decompress(b''.join(response.streaming_content))
+        with staticfiles_storage.open(
+            PrecompressedStaticTests.hashed_name
+        ) as original:
+            self.assertEqual(body, original.read())
+        response = self.client.get(url)
+        self.assertFalse(response.has_header('Content-Encoding'))
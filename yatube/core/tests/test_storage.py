@@ -0,0 +1,84 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from posts.models import Post, User
+from ..models import StoredFile
+from ..storage import ContentAddressedStorage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    '''
+    Files are deleted on commit, so tests run outside of a transaction
+    '''
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.storage = ContentAddressedStorage()
+
+    def test_identical_content_stored_once(self):
+        first = self.storage.save('posts/a.gif', ContentFile(b'same bytes'))
+        second = self.storage.save('posts/b.GIF', ContentFile(b'same bytes'))
+        other = self.storage.save('posts/c.gif', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertTrue(first.startswith('posts/') and first.endswith('.gif'))
+        self.assertEqual(StoredFile.objects.get(name=first).references, 2)
+
+    def test_identical_content_refreshes_mtime(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'same bytes'))
+        os.utime(self.storage.path(name), (0, 0))
+        self.storage.save('posts/b.gif', ContentFile(b'same bytes'))
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), 0)
+
+    def test_delete_waits_for_last_reference(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'shared'))
+        self.storage.save('posts/b.gif', ContentFile(b'shared'))
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_rolled_back_delete_keeps_file(self):
+        name = self.storage.save('posts/a.gif', ContentFile(b'kept'))
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.storage.delete(name)
+                raise RuntimeError('rollback')
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 1)
+
+    def test_dedupe_media_command(self):
+        user = User.objects.create_user(username='reposter')
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for filename in ('one.jpg', 'two.jpg'):
+            with open(
+                os.path.join(TEMP_MEDIA_ROOT, 'posts', filename), 'wb'
+            ) as legacy_file:
+                legacy_file.write(b'legacy image')
+            Post.objects.create(
+                text=filename,
+                author=user,
+                image=f'posts/{filename}',
+            )
+        call_command('dedupe_media', stdout=io.StringIO())
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(self.storage.exists(name))
+        self.assertFalse(self.storage.exists('posts/one.jpg'))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import tracing
+
+TRACES_DIR = tempfile.mkdtemp()
+EXPORT_PATH = os.path.join(TRACES_DIR, 'traces.jsonl')
+
+
+@override_settings(TRACING_EXPORT_PATH=EXPORT_PATH,
+                   TRACING_SERVER_TIMING=True)
+class TracingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TRACES_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'),
+                                   HTTP_X_FORWARDED_FOR='127.0.0.1')
+        timing = response['Server-Timing']
+        for category in ('app', 'db', 'cache', 'template'):
+            self.assertIn(f'{category};dur=', timing)
+        self.assertFalse(os.path.exists(EXPORT_PATH))
+
+    def test_no_server_timing_for_external_addresses(self):
+        for name, headers in (
+            ('direct', {'REMOTE_ADDR': '203.0.113.5'}),
+            ('proxied', {'HTTP_X_FORWARDED_FOR': '203.0.113.5'}),
+        ):
+            with self.subTest(name):
+                response = self.client.get(reverse('posts:index'), **headers)
+                self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(TRACING_SAMPLE_RATE=1.0)
+    def test_sampled_trace_is_exported_with_nested_spans(self):
+        self.client.get(reverse('posts:index'))
+        with open(EXPORT_PATH) as export_file:
+            trace = json.loads(export_file.readlines()[-1])
+        os.remove(EXPORT_PATH)
+        self.assertEqual(trace['view'], 'posts:index')
+        spans = trace['spans']
+        self.assertIsNone(spans[0]['parent'])
+        templates = [span['name'] for span in spans
+                     if span['category'] == 'template']
+        self.assertIn('posts/index.html', templates)
+        self.assertIn('includes/header.html', templates)
+        header = next(span for span in spans
+                      if span['name'] == 'includes/header.html')
+        self.assertEqual(spans[header['parent']]['category'], 'template')
+        self.assertTrue(all(span['duration'] is not None for span in spans))
+
+    def test_span_outside_of_trace_does_nothing(self):
+        with tracing.span('db', 'SELECT 1') as outside:
+            pass
+        self.assertIsNone(outside.trace)
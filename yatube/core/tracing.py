@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.template.base import Template
+
+_local = threading.local()
+_export_lock = threading.Lock()
+
+
+class Trace:
+    '''
+    Spans of one request. Unsampled trace keeps only totals per category
+    for the Server-Timing header
+    '''
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.open_categories = defaultdict(int)
+        self.spans = []
+        self.stack = []
+
+    def open(self, category, name):
+        self.open_categories[category] += 1
+        started = time.perf_counter()
+        if not self.sampled:
+            return started, None
+        record = {
+            'category': category,
+            'name': name,
+            'start': (started - self.started) * 1000,
+            'duration': None,
+            'parent': self.stack[-1] if self.stack else None,
+        }
+        self.stack.append(len(self.spans))
+        self.spans.append(record)
+        return started, record
+
+    def close(self, category, started, record):
+        duration = time.perf_counter() - started
+        self.open_categories[category] -= 1
+        # вложенные спаны той же категории уже учтены во внешнем
+        if not self.open_categories[category]:
+            self.totals[category] += duration
+        self.counts[category] += 1
+        if record is not None:
+            record['duration'] = duration * 1000
+            self.stack.pop()
+
+    def server_timing(self):
+        entries = [
+            f'{category};dur={total * 1000:.1f};'
+            f'desc="{self.counts[category]}"'
+            for category, total in self.totals.items()
+        ]
+        return ', '.join(entries)
+
+
+class span:
+    '''
+    Context manager which measures a block inside the current trace,
+    does nothing outside of a traced request
+    '''
+    __slots__ = ('category', 'name', 'trace', 'started', 'record')
+
+    def __init__(self, category, name=''):
+        self.category = category
+        self.name = name
+
+    def __enter__(self):
+        self.trace = getattr(_local, 'trace', None)
+        if self.trace is not None:
+            self.started, self.record = self.trace.open(self.category,
+                                                        self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace is not None:
+            self.trace.close(self.category, self.started, self.record)
+
+
+def start(sampled):
+    _local.trace = Trace(sampled)
+    return _local.trace
+
+
+def finish():
+    _local.trace = None
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    with span('db', sql):
+        return execute(sql, params, many, context)
+
+
+def export(trace, **fields):
+    '''
+    Append sampled trace as a JSON line to TRACING_EXPORT_PATH
+    '''
+    line = json.dumps(dict(fields, spans=trace.spans), ensure_ascii=False)
+    os.makedirs(os.path.dirname(settings.TRACING_EXPORT_PATH),
+                exist_ok=True)
+    with _export_lock:
+        with open(settings.TRACING_EXPORT_PATH, 'a') as export_file:
+            export_file.write(line + '\n')
+
+
+def _traced_render(render):
+    def traced_render(self, context):
+        with span('template', self.origin.template_name or self.name):
+            return render(self, context)
+    traced_render.traced = True
+    return traced_render
+
+
+def install():
+    '''
+    Wrap Template.render, so that every template and include gets a span
+    '''
+    if not getattr(Template.render, 'traced', False):
+        Template.render = _traced_render(Template.render)
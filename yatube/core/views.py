@@ -1,4 +1,25 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified, StreamingHttpResponse)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics as metrics_registry
+from .internal import is_internal
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+HASHED_STATIC_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
 
 
 def page_not_found(request, exception):
@@ -15,3 +36,152 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def _safe_path(root, path, private_dirs=()):
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    if path.split('/', 1)[0] in private_dirs:
+        raise Http404
+    try:
+        full_path = safe_join(root, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    return full_path
+
+
+def _cache_control(path):
+    if any(re.match(pattern, path)
+           for pattern in settings.MEDIA_IMMUTABLE_PATTERNS):
+        return IMMUTABLE
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _parse_range(header, size):
+    match = RANGE_RE.match(header)
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    else:
+        start = max(size - int(end), 0)
+        end = size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+def _read_range(full_path, start, end):
+    with open(full_path, 'rb') as media_file:
+        media_file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = media_file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def media(request, path):
+    full_path = _safe_path(
+        settings.MEDIA_ROOT,
+        path,
+        settings.MEDIA_PRIVATE_DIRS,
+    )
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        )
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = full_path
+    else:
+        byte_range = _parse_range(
+            request.META.get('HTTP_RANGE', ''),
+            stat.st_size,
+        )
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(full_path, start, end),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            # FileResponse goes through wsgi.file_wrapper,
+            # servers use sendfile() for it
+            response = FileResponse(
+                open(full_path, 'rb'),
+                content_type=content_type,
+            )
+        response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = _cache_control(path)
+    return response
+
+
+def static(request, path):
+    full_path = _safe_path(settings.STATIC_ROOT, path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding = None
+    for name, extension in ENCODINGS:
+        if name in accept_encoding and os.path.isfile(full_path + extension):
+            encoding = name
+            full_path += extension
+            break
+    stat = os.stat(full_path)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+    response = FileResponse(
+        open(full_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_STATIC_RE.search(path):
+        response['Cache-Control'] = IMMUTABLE
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_CACHE_MAX_AGE}'
+        )
+    return response
+
+
+def metrics(request):
+    '''
+    Metrics of all worker processes in Prometheus text format,
+    available to internal addresses and scrapers with the token
+    '''
+    if not is_internal(request):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
-from .models import Group, Post, Comment, Follow
+from . import deletion
+from .forms import use_group_directory
+from .models import (Comment, Digest, Follow, Group, Post, User,
+                     UserDeletion)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,8 +14,69 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # list_editable строит выбор группы для каждой строки
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group':
+            use_group_directory(field)
+        return field
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(Digest)
+
+
+class DeferredDeletionUserAdmin(UserAdmin):
+    '''
+    Delete users with their content in background batches instead of
+    one cascade transaction
+    '''
+    def get_deleted_objects(self, objs, request):
+        # стандартная страница подтверждения загружает весь каскад,
+        # права проверяются по моделям, объекты только считаются
+        model_count = {}
+        perms_needed = set()
+        stage_names = dict(UserDeletion.STAGE_CHOICES)
+        for obj in objs:
+            for stage, queryset in deletion.stages(obj.pk):
+                count = queryset.count()
+                if not count:
+                    continue
+                name = stage_names[stage]
+                model_count[name] = model_count.get(name, 0) + count
+                model_admin = self.admin_site._registry.get(queryset.model)
+                if (model_admin is not None
+                        and not model_admin.has_delete_permission(request)):
+                    perms_needed.add(queryset.model._meta.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        deletion.start(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            deletion.start(user)
+
+
+class UserDeletionAdmin(admin.ModelAdmin):
+    list_display = ('username', 'stage', 'progress', 'deleted', 'total',
+                    'created', 'finished',)
+    list_filter = ('stage',)
+    search_fields = ('username',)
+    readonly_fields = ('user', 'username', 'stage', 'total', 'deleted',
+                       'created', 'finished',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def progress(self, obj):
+        return f'{100 * obj.deleted // max(obj.total, 1)}%'
+    progress.short_description = 'Прогресс'
+
+
+admin.site.unregister(User)
+admin.site.register(User, DeferredDeletionUserAdmin)
+admin.site.register(UserDeletion, UserDeletionAdmin)
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core import jobs
+from .models import Comment, Digest, Follow, Post, User, UserDeletion
+
+JOB_NAME = 'posts.delete_user'
+
+
+def stages(user_id):
+    '''
+    Querysets of every stage in deletion order, comments go before
+    posts, so a batch of posts cascades to a few rows at most
+    '''
+    return (
+        (UserDeletion.COMMENTS, Comment.objects.filter(author_id=user_id)),
+        (UserDeletion.POST_COMMENTS,
+         Comment.objects.filter(post__author_id=user_id)),
+        (UserDeletion.FOLLOWS,
+         Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))),
+        (UserDeletion.DIGESTS, Digest.objects.filter(user_id=user_id)),
+        (UserDeletion.POSTS, Post.objects.filter(author_id=user_id)),
+    )
+
+
+def counts(user_id):
+    '''
+    Return {stage: number of objects} of user content
+    '''
+    return {
+        stage: queryset.count() for stage, queryset in stages(user_id)
+    }
+
+
+def start(user):
+    '''
+    Deactivate user, which hides the content at once,
+    and enqueue deletion in batches
+    '''
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        user.is_active = False
+        deletion, created = UserDeletion.objects.get_or_create(
+            user=user,
+            defaults={
+                'username': user.username,
+                'total': sum(counts(user.pk).values()) + 1,
+            },
+        )
+        if created:
+            jobs.enqueue(JOB_NAME, {'deletion_id': deletion.pk})
+    return deletion
+
+
+def _release_images(names):
+    for name in names:
+        default_storage.delete(name)
+
+
+def _delete_batch(queryset):
+    ids = list(
+        queryset
+        .order_by('pk')
+        .values_list('pk', flat=True)[:settings.USER_DELETION_BATCH_SIZE]
+    )
+    if queryset.model is Post:
+        images = list(
+            Post.objects
+            .filter(pk__in=ids)
+            .exclude(image='')
+            .values_list('image', flat=True)
+        )
+        # файлы удаляются только после фиксации удаления постов
+        transaction.on_commit(lambda: _release_images(images))
+    queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def step(deletion):
+    '''
+    Delete one batch of the current stage, return False when done
+    '''
+    order = [stage for stage, _ in UserDeletion.STAGE_CHOICES]
+    querysets = dict(stages(deletion.user_id))
+    while deletion.stage in querysets:
+        deleted = _delete_batch(querysets[deletion.stage])
+        if deleted:
+            deletion.deleted += deleted
+            deletion.save(update_fields=('stage', 'deleted'))
+            return True
+        deletion.stage = order[order.index(deletion.stage) + 1]
+    if deletion.stage == UserDeletion.USER:
+        if deletion.user_id is not None:
+            User.objects.filter(pk=deletion.user_id).delete()
+            deletion.deleted += 1
+        deletion.stage = UserDeletion.DONE
+        deletion.finished = timezone.now()
+        deletion.save(update_fields=('stage', 'deleted', 'finished'))
+    return False
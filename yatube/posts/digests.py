@@ -0,0 +1,150 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Max
+from django.template import loader
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+from .models import Digest, Follow, Post, User
+
+JOB_NAME = 'posts.build_digests'
+
+
+def _send(messages):
+    connection = get_connection()
+    chunk = settings.DIGEST_SEND_CHUNK
+    for start in range(0, len(messages), chunk):
+        connection.send_messages(messages[start:start + chunk])
+
+
+def _build_chunk(user_ids, since, until, new_posts, posts_by_author):
+    authors_by_user = defaultdict(list)
+    edges = (
+        Follow.objects
+        .filter(
+            user_id__in=user_ids,
+            author_id__in=new_posts.values('author'),
+        )
+        .values_list('user_id', 'author_id')
+    )
+    for user_id, author_id in edges:
+        authors_by_user[user_id].append(author_id)
+    usernames = dict(
+        User.objects
+        .filter(id__in={a for ids in authors_by_user.values() for a in ids})
+        .values_list('id', 'username')
+    )
+    # сводки повторного запуска за тот же период не создаются
+    # и не отправляются еще раз
+    existing = set(
+        Digest.objects
+        .filter(user_id__in=authors_by_user, period_end=until)
+        .values_list('user_id', flat=True)
+    )
+    digests = [
+        Digest(
+            user_id=user_id,
+            period_start=since,
+            period_end=until,
+            posts_count=sum(posts_by_author[a] for a in author_ids),
+            authors=', '.join(sorted(usernames[a] for a in author_ids)),
+        ) for user_id, author_ids in authors_by_user.items()
+        if user_id not in existing
+    ]
+    Digest.objects.bulk_create(digests, ignore_conflicts=True)
+    if not settings.DIGEST_EMAIL or not digests:
+        return
+    recipients = {
+        user_id: (username, email)
+        for user_id, username, email in (
+            User.objects
+            .filter(id__in=user_ids, is_active=True)
+            .exclude(email='')
+            .values_list('id', 'username', 'email')
+        )
+    }
+    messages = [
+        EmailMessage(
+            'Новые посты авторов, на которых вы подписаны',
+            loader.render_to_string(
+                'posts/email/digest.txt',
+                {
+                    'digest': digest,
+                    'username': recipients[digest.user_id][0],
+                },
+            ),
+            to=[recipients[digest.user_id][1]],
+        ) for digest in digests if digest.user_id in recipients
+    ]
+    # письма уходят только после фиксации сводок
+    transaction.on_commit(lambda: _send(messages))
+
+
+def build_digests(since, until, cursor=0):
+    '''
+    Build digests for followers of authors who posted in (since, until]
+    Followers are processed in chunks ordered by id; when the time budget
+    is spent the rest is left to a continuation job
+    Return id of the last processed user or None when all are done
+    '''
+    started = time.monotonic()
+    new_posts = Post.objects.filter(created__gt=since, created__lte=until)
+    posts_by_author = dict(
+        new_posts
+        .order_by()
+        .values('author')
+        .annotate(count=Count('id'))
+        .values_list('author', 'count')
+    )
+    if not posts_by_author:
+        return None
+    followers = (
+        Follow.objects
+        .filter(author_id__in=new_posts.values('author'))
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+    while True:
+        user_ids = list(
+            followers.filter(user_id__gt=cursor)[:settings.DIGEST_CHUNK]
+        )
+        if not user_ids:
+            return None
+        _build_chunk(user_ids, since, until, new_posts, posts_by_author)
+        cursor = user_ids[-1]
+        if time.monotonic() - started > settings.DIGEST_TIME_BUDGET:
+            jobs.enqueue(JOB_NAME, {
+                'since': since.isoformat(),
+                'until': until.isoformat(),
+                'cursor': cursor,
+            })
+            return cursor
+
+
+def schedule(delay=0):
+    '''
+    Enqueue the next periodic run unless one is already waiting
+    '''
+    waiting = Job.objects.filter(
+        name=JOB_NAME,
+        payload='{}',
+        status=Job.PENDING,
+    )
+    if not waiting.exists():
+        jobs.enqueue(JOB_NAME, delay=delay)
+
+
+def periodic_window():
+    until = timezone.now()
+    last_end = Digest.objects.aggregate(last=Max('period_end'))['last']
+    since = until - timedelta(seconds=settings.DIGEST_MAX_LOOKBACK)
+    if last_end and last_end > since:
+        since = last_end
+    return since, until
@@ -0,0 +1,150 @@
+import uuid
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Follow, FollowCounter
+
+VERSION_KEY = 'follow_graph:version:{}'
+# 'Q' вмещает любой id пользователя, тип массива входит в ключ кэша
+TYPECODE = 'Q'
+FOLLOWEES_KEY = 'follow_graph:followees_q:{}:{}'
+TIMEOUT = settings.FOLLOW_GRAPH_CACHE_TIMEOUT
+BATCH_SIZE = 500
+
+
+def _cache():
+    # подписки в разных воркерах должны совпадать
+    return caches['shared']
+
+
+def _version(user_id):
+    '''
+    Version of cached followees of the user. Data is stored under
+    the version read before the DB query, so a reader who raced with
+    a change writes under the old version nobody reads any more
+    '''
+    cache = _cache()
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def _load_followees(key, user_id):
+    sorted_ids = array(TYPECODE, sorted(
+        Follow.objects
+        .filter(user_id=user_id)
+        .values_list('author_id', flat=True)
+    ))
+    _cache().set(key, sorted_ids.tobytes(), TIMEOUT)
+    return sorted_ids
+
+
+def followees(user_id):
+    '''
+    Return sorted array of author ids the user follows
+    '''
+    key = FOLLOWEES_KEY.format(user_id, _version(user_id))
+    packed = _cache().get(key)
+    if packed is None:
+        return _load_followees(key, user_id)
+    sorted_ids = array(TYPECODE)
+    sorted_ids.frombytes(packed)
+    return sorted_ids
+
+
+def _contains(sorted_ids, author_id):
+    position = bisect_left(sorted_ids, author_id)
+    return position < len(sorted_ids) and sorted_ids[position] == author_id
+
+
+def is_following(user_id, author_id):
+    if user_id is None or user_id == author_id:
+        return False
+    return _contains(followees(user_id), author_id)
+
+
+def counts(user_id):
+    '''
+    Return (followers, followees) of the user from maintained counters
+    '''
+    return (
+        FollowCounter.objects
+        .filter(user_id=user_id)
+        .values_list('followers', 'followees')
+        .first()
+    ) or (0, 0)
+
+
+def _increment(user_id, field):
+    updated = FollowCounter.objects.filter(user_id=user_id).update(
+        **{field: F(field) + 1}
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            FollowCounter.objects.create(user_id=user_id, **{field: 1})
+    except IntegrityError:
+        FollowCounter.objects.filter(user_id=user_id).update(
+            **{field: F(field) + 1}
+        )
+
+
+def _decrement(user_id, field):
+    FollowCounter.objects.filter(
+        user_id=user_id,
+        **{f'{field}__gt': 0},
+    ).update(**{field: F(field) - 1})
+
+
+def _invalidate(user_id):
+    _cache().set(VERSION_KEY.format(user_id), uuid.uuid4().hex, TIMEOUT)
+
+
+def edge_added(user_id, author_id):
+    '''
+    Count the new follow in the same transaction and invalidate
+    cached followees after commit, a rolled back change leaves
+    the cache untouched
+    '''
+    _increment(author_id, 'followers')
+    _increment(user_id, 'followees')
+    transaction.on_commit(lambda: _invalidate(user_id))
+
+
+def edge_removed(user_id, author_id):
+    _decrement(author_id, 'followers')
+    _decrement(user_id, 'followees')
+    transaction.on_commit(lambda: _invalidate(user_id))
+
+
+def fill_counters(users):
+    '''
+    Create counters of users whose follows were inserted in bulk,
+    bypassing the Follow signals
+    '''
+    counters = {}
+    for field, owner in (('followers', 'author_id'), ('followees', 'user_id')):
+        rows = (
+            Follow.objects
+            .filter(**{f'{owner}__in': users.values('id')})
+            .order_by()
+            .values(owner)
+            .annotate(count=Count('id'))
+            .values_list(owner, 'count')
+        )
+        for user_id, count in rows.iterator():
+            counter = counters.setdefault(
+                user_id, FollowCounter(user_id=user_id)
+            )
+            setattr(counter, field, count)
+    FollowCounter.objects.bulk_create(counters.values(), batch_size=BATCH_SIZE,
+                                      ignore_conflicts=True)
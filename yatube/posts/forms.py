@@ -1,13 +1,55 @@
 from django import forms
 
+from . import group_directory
+from .images import fill_metadata, validate_dimensions
 from .models import Comment, Post
 
 
+class GroupChoiceIterator:
+    '''
+    Choices of the group select from the process-local group directory
+    instead of a query per form
+    '''
+    def __init__(self, field):
+        self.field = field
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for group in group_directory.groups():
+            yield (group.pk, self.field.label_from_instance(group))
+
+    def __len__(self):
+        return (len(group_directory.groups())
+                + (self.field.empty_label is not None))
+
+
+def use_group_directory(field):
+    field.iterator = GroupChoiceIterator
+    field.widget.choices = field.choices
+    return field
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image',)
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        use_group_directory(self.fields['group'])
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if image and 'image' in self.changed_data:
+            validate_dimensions(image)
+        return image
+
+    def save(self, commit=True):
+        if 'image' in self.changed_data:
+            fill_metadata(self.instance, self.cleaned_data['image'] or None)
+        return super().save(commit)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
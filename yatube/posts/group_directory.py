@@ -0,0 +1,79 @@
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Group
+
+VERSION_KEY = 'group_directory:version'
+
+# (version, groups, by id, by slug), заменяется целиком
+_state = (None, [], {}, {})
+
+
+def _cache():
+    # версия должна быть видна всем воркерам
+    return caches['shared']
+
+
+def _version():
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _directory():
+    '''
+    Return state of this process, reload all groups when another process
+    has changed the version key
+    '''
+    global _state
+    version = _version()
+    if _state[0] != version:
+        groups = list(Group.objects.order_by('pk'))
+        _state = (
+            version,
+            groups,
+            {group.pk: group for group in groups},
+            {group.slug: group for group in groups},
+        )
+    return _state
+
+
+def groups():
+    return _directory()[1]
+
+
+def get(group_id):
+    return _directory()[2].get(group_id)
+
+
+def get_by_slug(slug):
+    return _directory()[3].get(slug)
+
+
+def attach(posts):
+    '''
+    Set post.group from the directory instead of joining posts_group
+    '''
+    by_id = _directory()[2]
+    for post in posts:
+        group = by_id.get(post.group_id)
+        if group is not None:
+            post.group = group
+
+
+def invalidate():
+    _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def group_changed():
+    '''
+    Invalidate now for this process and again after commit, so that
+    nobody keeps a directory loaded before the commit
+    '''
+    invalidate()
+    transaction.on_commit(invalidate)
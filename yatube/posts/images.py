@@ -0,0 +1,158 @@
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import transaction
+from sorl.thumbnail import get_thumbnail
+
+from core import jobs
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {
+    'JPEG': '.jpg',
+    'WEBP': '.webp',
+}
+
+
+def read_header(image_file):
+    '''
+    Return width, height and format, pixel data is not decoded
+    '''
+    from PIL import Image
+
+    position = image_file.tell()
+    try:
+        with Image.open(image_file) as image:
+            return image.width, image.height, image.format
+    finally:
+        image_file.seek(position)
+
+
+def validate_dimensions(image_file):
+    width, height, _ = read_header(image_file)
+    if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+        raise ValidationError(
+            'Слишком большое изображение: %(width)sx%(height)s',
+            params={'width': width, 'height': height},
+        )
+    return width, height
+
+
+def _encode(image):
+    from PIL import Image
+
+    image_format = settings.IMAGE_PIPELINE_FORMAT
+    if image_format == 'JPEG' and image.mode != 'RGB':
+        if 'A' in image.getbands():
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+    output = io.BytesIO()
+    image.save(
+        output,
+        image_format,
+        quality=settings.IMAGE_PIPELINE_QUALITY,
+        optimize=True,
+        progressive=True,
+    )
+    return output.getvalue()
+
+
+def normalize(storage, name):
+    '''
+    Downsize, fix orientation and re-encode stored image without EXIF
+    Return name of the stored result and number of bytes saved,
+    negative when the stripped image is larger. The original is kept,
+    the caller deletes it once nothing refers to it
+    '''
+    from PIL import Image, ImageOps
+
+    with storage.open(name) as source:
+        original_size = source.size
+        with Image.open(source) as image:
+            if getattr(image, 'is_animated', False):
+                return name, 0
+            # EXIF с координатами и поворотом убирается, даже если
+            # новый файл не меньше исходного
+            has_exif = bool(image.info.get('exif')) or bool(image.getexif())
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(settings.IMAGE_PIPELINE_MAX_SIZE)
+            data = _encode(image)
+    if not has_exif and len(data) >= original_size:
+        return name, 0
+    root, _ = os.path.splitext(name)
+    extension = EXTENSIONS[settings.IMAGE_PIPELINE_FORMAT]
+    new_name = storage.save(root + extension, ContentFile(data))
+    return new_name, original_size - len(data)
+
+
+def fill_metadata(post, image_file=None):
+    '''
+    Copy image geometry, format and size into Post fields
+    '''
+    if not post.image:
+        post.image_width = post.image_height = post.image_bytes = None
+        post.image_format = ''
+        return
+    if image_file is None:
+        with post.image.storage.open(post.image.name) as stored_file:
+            fill_metadata(post, stored_file)
+        return
+    (post.image_width,
+     post.image_height,
+     post.image_format) = read_header(image_file)
+    post.image_bytes = image_file.size
+
+
+METADATA_FIELDS = ('image_width', 'image_height', 'image_format',
+                   'image_bytes')
+
+
+def normalize_post_image(post_id):
+    post = Post.objects.only('image').get(pk=post_id)
+    if not post.image:
+        return 0
+    original_name = post.image.name
+    new_name, saved = normalize(post.image.storage, original_name)
+    if new_name != original_name:
+        storage = post.image.storage
+        post.image.name = new_name
+        fill_metadata(post)
+        updated = Post.objects.filter(
+            pk=post_id,
+            image=original_name,
+        ).update(
+            image=new_name,
+            **{field: getattr(post, field) for field in METADATA_FIELDS},
+        )
+        # картинку могли заменить, пока шла задача, тогда не нужна новая
+        obsolete = original_name if updated else new_name
+        # при откате пост продолжает ссылаться на исходный файл
+        transaction.on_commit(lambda: storage.delete(obsolete))
+    logger.info(
+        'post %s image %s normalized, %s bytes saved',
+        post_id, new_name, saved,
+    )
+    return saved
+
+
+def generate_thumbnails(post):
+    for geometry, options in settings.POST_THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+def schedule_normalization(post):
+    '''
+    Normalize image and generate its thumbnails in background jobs
+    '''
+    if not post.image:
+        return
+    jobs.enqueue('posts.normalize_image', {'post_id': post.pk})
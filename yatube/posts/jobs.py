@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from core import jobs
+from . import deletion, digests, markup, trending
+from .images import generate_thumbnails, normalize_post_image
+from .models import Comment, Post, UserDeletion
+
+RENDERED_MODELS = {'post': Post, 'comment': Comment}
+
+
+@jobs.handler('posts.normalize_image')
+def normalize_image(post_id):
+    if Post.objects.filter(pk=post_id).exists():
+        normalize_post_image(post_id)
+        jobs.enqueue('posts.generate_thumbnails', {'post_id': post_id})
+
+
+@jobs.handler('posts.generate_thumbnails', batch=True)
+def thumbnails(payloads):
+    posts = (
+        Post.objects
+        .filter(pk__in=[payload['post_id'] for payload in payloads])
+        .exclude(image='')
+        .only('id', 'image', 'image_width', 'image_height')
+    )
+    for post in posts:
+        generate_thumbnails(post)
+
+
+@jobs.handler(digests.JOB_NAME)
+def build_digests(since=None, until=None, cursor=0):
+    if since is None:
+        digests.schedule(delay=settings.DIGEST_INTERVAL)
+        since, until = digests.periodic_window()
+    else:
+        since, until = parse_datetime(since), parse_datetime(until)
+    digests.build_digests(since, until, cursor)
+
+
+@jobs.handler(trending.JOB_NAME)
+def refresh_trending():
+    trending.schedule(delay=settings.TRENDING_REFRESH_INTERVAL)
+    trending.refresh()
+
+
+@jobs.handler(deletion.JOB_NAME)
+def delete_user(deletion_id):
+    user_deletion = UserDeletion.objects.filter(pk=deletion_id).first()
+    if user_deletion is not None and deletion.step(user_deletion):
+        jobs.enqueue(deletion.JOB_NAME, {'deletion_id': deletion_id})
+
+
+@jobs.handler(markup.JOB_NAME)
+def rerender_html(model, cursor=0):
+    next_cursor = markup.rerender(RENDERED_MODELS[model], cursor)
+    if next_cursor is not None:
+        jobs.enqueue(markup.JOB_NAME, {'model': model, 'cursor': next_cursor})
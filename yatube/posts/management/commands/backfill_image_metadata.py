@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.images import METADATA_FIELDS, fill_metadata
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Fill image width, height, format and size for existing posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = (
+            Post.objects
+            .exclude(image='')
+            .filter(image_width__isnull=True)
+            .only('id', 'image')
+        )
+        batch = []
+        filled = missing = 0
+        for post in posts.iterator(chunk_size=batch_size):
+            try:
+                fill_metadata(post)
+            except (OSError, ValueError):
+                missing += 1
+                self.stderr.write(f'Не удалось прочитать {post.image.name}')
+                continue
+            batch.append(post)
+            if len(batch) >= batch_size:
+                Post.objects.bulk_update(batch, METADATA_FIELDS)
+                filled += len(batch)
+                batch = []
+        Post.objects.bulk_update(batch, METADATA_FIELDS)
+        filled += len(batch)
+        self.stdout.write(
+            f'Заполнено постов: {filled}, не найдено файлов: {missing}'
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import digests
+
+
+class Command(BaseCommand):
+    help = 'Start periodic building of follower digests'
+
+    def handle(self, *args, **options):
+        digests.schedule()
+        self.stdout.write('Сборка сводок поставлена в очередь')
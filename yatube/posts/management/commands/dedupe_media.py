@@ -0,0 +1,73 @@
+import os
+import re
+import shutil
+from functools import partial
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.storage import acquire, content_name, file_sha256
+from posts.models import Post
+
+HASHED_NAME = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{64}\.?\w*$')
+
+
+class Command(BaseCommand):
+    help = 'Rename post images by content hash and remove duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='posts')
+
+    def iter_names(self, directory):
+        root = default_storage.path(directory)
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                relative = os.path.relpath(
+                    os.path.join(dirpath, filename),
+                    root,
+                ).replace(os.sep, '/')
+                if not HASHED_NAME.match(relative):
+                    yield f'{directory}/{relative}'
+
+    def copy(self, path, new_path):
+        try:
+            os.link(path, new_path)
+        except OSError:
+            temp_path = f'{new_path}.tmp'
+            shutil.copyfile(path, temp_path)
+            os.replace(temp_path, new_path)
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        moved = removed = saved = 0
+        for name in self.iter_names(directory):
+            path = default_storage.path(name)
+            with open(path, 'rb') as source:
+                sha256 = file_sha256(source)
+            size = os.path.getsize(path)
+            extension = os.path.splitext(name)[1].lower()
+            new_name = content_name(directory, sha256, extension)
+            new_path = default_storage.path(new_name)
+            if os.path.exists(new_path):
+                removed += 1
+                saved += size
+            else:
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                # копия, а не перенос: до фиксации посты ссылаются
+                # на старое имя
+                self.copy(path, new_path)
+                moved += 1
+            with transaction.atomic():
+                references = (
+                    Post.objects
+                    .filter(image=name)
+                    .update(image=new_name)
+                )
+                if references:
+                    acquire(new_name, sha256, size, count=references)
+                transaction.on_commit(partial(os.remove, path))
+        self.stdout.write(
+            f'Переименовано файлов: {moved}, удалено дубликатов: {removed}, '
+            f'освобождено байт: {saved}'
+        )
@@ -0,0 +1,33 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from posts import media_gc
+
+
+class Command(BaseCommand):
+    help = 'Delete post images and thumbnails nothing refers to'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report files that would be deleted',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        files = Counter()
+        sizes = Counter()
+        for kind, name, size in media_gc.collect(dry_run):
+            files[kind] += 1
+            sizes[kind] += size
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name} ({size} байт)')
+        action = 'Будет удалено' if dry_run else 'Удалено'
+        self.stdout.write(
+            f'{action} картинок: {files[media_gc.ORIGINAL]} '
+            f'({sizes[media_gc.ORIGINAL]} байт), '
+            f'миниатюр: {files[media_gc.THUMBNAIL]} '
+            f'({sizes[media_gc.THUMBNAIL]} байт)'
+        )
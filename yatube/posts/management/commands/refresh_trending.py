@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Rebuild trending scores now and start periodic refresh'
+
+    def handle(self, *args, **options):
+        ranked = trending.refresh()
+        trending.schedule()
+        self.stdout.write(f'Постов в рейтинге: {ranked}')
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seed import Plan, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, groups, follows, posts '
+        'and comments: Zipf author activity, power-law follow graph, '
+        'bursty timestamps. The same --seed gives the same data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--groups', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=2_000_000)
+        parser.add_argument('--follows', type=float, default=20,
+                            help='Среднее число подписок пользователя')
+        parser.add_argument('--images', type=int, default=0,
+                            help='Размер пула картинок, 0 без картинок')
+        parser.add_argument('--image-ratio', type=float, default=0.2)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=20_000)
+        parser.add_argument('--workers', type=int,
+                            default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 and (options['posts'] or options['follows']):
+            raise CommandError('Нужно хотя бы два пользователя')
+        if options['comments'] and not options['posts']:
+            raise CommandError('Комментариям нужны посты')
+        plan = Plan(
+            seed=options['seed'],
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            image_ratio=options['image_ratio'],
+            batch_size=options['batch_size'],
+            days=options['days'],
+        )
+        started = time.monotonic()
+        inserted = seed(plan, options['workers'], options['images'])
+        elapsed = time.monotonic() - started
+        total = sum(inserted.values())
+        for model, count in inserted.items():
+            self.stdout.write(f'{model}: {count}')
+        self.stdout.write(
+            f'Всего строк: {total} за {elapsed:.1f} с, '
+            f'{total / max(elapsed, 1e-9):.0f} строк/с'
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.warmup import hot_urls, warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Render hottest feeds to fill page, fragment and thumbnail caches. '
+        'Process-local caches (LocMemCache) are filled only in this '
+        'process, set WARMUP_ON_START to warm every web worker instead'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int,
+                            default=settings.WARMUP_PAGES)
+        parser.add_argument('--groups', type=int,
+                            default=settings.WARMUP_GROUPS)
+        parser.add_argument('--profiles', type=int,
+                            default=settings.WARMUP_PROFILES)
+        parser.add_argument('--workers', type=int,
+                            default=settings.WARMUP_WORKERS)
+        parser.add_argument('--time-budget', type=float,
+                            default=settings.WARMUP_TIME_BUDGET)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        urls = hot_urls(
+            options['pages'],
+            options['groups'],
+            options['profiles'],
+        )
+        results = warmup(urls, options['workers'], options['time_budget'])
+        for url, status in results.items():
+            if status is None:
+                self.stdout.write(f'{url}: пропущен, время вышло')
+            elif status != 200:
+                self.stderr.write(f'{url}: {status}')
+        done = sum(status is not None for status in results.values())
+        self.stdout.write(
+            f'Прогрето страниц: {done} из {len(urls)} '
+            f'за {time.monotonic() - started:.1f} с'
+        )
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+
+from core import jobs
+from core.models import Job
+
+JOB_NAME = 'posts.rerender_html'
+# увеличивается при каждом изменении правил render, сохраненный HTML
+# старых версий перестраивается в фоне
+VERSION = 1
+
+
+def render(text):
+    '''
+    Escaped text with line breaks, the same as |linebreaksbr in templates
+    '''
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def rendered(html, version, text):
+    '''
+    Stored HTML when it is up to date, otherwise render text now
+    '''
+    if version == VERSION:
+        return mark_safe(html)
+    return mark_safe(render(text))
+
+
+def rerender(model, cursor=0):
+    '''
+    Render one batch of rows stored by older versions,
+    return cursor of the next batch or None
+    '''
+    rows = list(
+        model.objects
+        .filter(pk__gt=cursor)
+        .exclude(html_version=VERSION)
+        .order_by('pk')
+        .only('id', 'text')[:settings.HTML_RERENDER_BATCH_SIZE]
+    )
+    for row in rows:
+        row.render_text()
+    model.objects.bulk_update(rows, model.RENDERED_FIELDS)
+    if len(rows) < settings.HTML_RERENDER_BATCH_SIZE:
+        return None
+    return rows[-1].pk
+
+
+def schedule(models):
+    '''
+    Enqueue re-rendering of {name: model} which have stale rows
+    unless a re-rendering is already waiting
+    '''
+    if Job.objects.filter(name=JOB_NAME, status=Job.PENDING).exists():
+        return
+    for name, model in models.items():
+        if model.objects.exclude(html_version=VERSION).exists():
+            jobs.enqueue(JOB_NAME, {'model': name})
@@ -0,0 +1,240 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+from sorl.thumbnail.models import KVStore
+
+from core.models import StoredFile
+from .models import Post
+
+ORIGINAL = 'original'
+THUMBNAIL = 'thumbnail'
+
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _sort_key(entry):
+    # 'a.jpg' < 'a/b.jpg', как и у полных имен в базе
+    if entry.is_dir(follow_symlinks=False):
+        return entry.name + '/'
+    return entry.name
+
+
+def _walk(path, name):
+    with os.scandir(path) as entries:
+        entries = sorted(entries, key=_sort_key)
+    for entry in entries:
+        entry_name = f'{name}/{entry.name}'
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path, entry_name)
+        elif entry.is_file(follow_symlinks=False):
+            yield entry_name, entry.stat(follow_symlinks=False)
+
+
+def walk(storage, directory):
+    '''
+    Yield (name, stat) of files under directory ordered by name,
+    only one directory listing is held at each level
+    '''
+    root = storage.path(directory)
+    if os.path.isdir(root):
+        yield from _walk(root, directory)
+
+
+def _old(files):
+    cutoff = time.time() - settings.MEDIA_GC_MIN_AGE
+    return (
+        (name, stat) for name, stat in files
+        if stat.st_mtime < cutoff
+    )
+
+
+def _still_old(storage, name):
+    # после обхода каталога файл мог получить новую ссылку: повторная
+    # загрузка того же содержимого обновляет mtime
+    try:
+        mtime = os.path.getmtime(storage.path(name))
+    except OSError:
+        return False
+    return mtime < time.time() - settings.MEDIA_GC_MIN_AGE
+
+
+def referenced_names(directory):
+    return (
+        Post.objects
+        .filter(image__startswith=f'{directory}/')
+        .order_by('image')
+        .values_list('image', flat=True)
+        .distinct()
+        .iterator(chunk_size=settings.MEDIA_GC_BATCH_SIZE)
+    )
+
+
+def unreferenced(files, names):
+    '''
+    Merge two sorted streams, yield files missing from names
+    '''
+    name = next(names, None)
+    for file_name, stat in files:
+        while name is not None and name < file_name:
+            name = next(names, None)
+        if name != file_name:
+            yield file_name, stat
+
+
+def _delete_originals(names):
+    # ссылки в StoredFile могли остаться от замененных картинок,
+    # файл не нужен ни одному посту, поэтому запись удаляется целиком
+    StoredFile.objects.filter(name__in=names).delete()
+    for name in names:
+        default_storage.delete(name)
+
+
+def collect_originals(directory, dry_run=False):
+    '''
+    Yield and delete images of directory no post refers to
+    '''
+    files = unreferenced(
+        _old(walk(default_storage, directory)),
+        referenced_names(directory),
+    )
+    for batch in batches(files, settings.MEDIA_GC_BATCH_SIZE):
+        names = [name for name, _ in batch]
+        # порядок сортировки базы мог не совпасть с порядком Python,
+        # а посты могли появиться во время обхода
+        referenced = set(
+            Post.objects
+            .filter(image__in=names)
+            .values_list('image', flat=True)
+        )
+        orphans = [
+            (name, stat.st_size) for name, stat in batch
+            if name not in referenced and _still_old(default_storage, name)
+        ]
+        if not dry_run:
+            _delete_originals([name for name, _ in orphans])
+        for name, size in orphans:
+            yield ORIGINAL, name, size
+
+
+def _kvstore_keys(identity):
+    '''
+    Yield batches of kvstore keys with keyset pagination,
+    entries may be deleted between batches
+    '''
+    prefix = add_prefix('', identity)
+    last = prefix
+    while True:
+        keys = list(
+            KVStore.objects
+            .filter(key__startswith=prefix, key__gt=last)
+            .order_by('key')
+            .values_list('key', flat=True)[:settings.MEDIA_GC_BATCH_SIZE]
+        )
+        if not keys:
+            return
+        last = keys[-1]
+        yield [del_prefix(key) for key in keys]
+
+
+def _values(raw_keys):
+    return dict(
+        KVStore.objects
+        .filter(key__in=raw_keys)
+        .values_list('key', 'value')
+    )
+
+
+def _file_size(storage, name):
+    try:
+        return os.path.getsize(storage.path(name))
+    except OSError:
+        return 0
+
+
+def collect_stale_thumbnails(dry_run=False):
+    '''
+    Yield and delete thumbnails of sources no post refers to
+    '''
+    for keys in _kvstore_keys('thumbnails'):
+        values = _values(
+            [add_prefix(key) for key in keys]
+            + [add_prefix(key, 'thumbnails') for key in keys]
+        )
+        sources = [
+            deserialize_image_file(values[add_prefix(key)])
+            for key in keys if add_prefix(key) in values
+        ]
+        referenced = set(
+            Post.objects
+            .filter(image__in=[source.name for source in sources])
+            .values_list('image', flat=True)
+        )
+        for source in sources:
+            if source.name in referenced:
+                continue
+            thumbnail_keys = deserialize(
+                values.get(add_prefix(source.key, 'thumbnails'), '[]')
+            )
+            thumbnails = _values(
+                [add_prefix(key) for key in thumbnail_keys]
+            ).values()
+            found = []
+            for value in thumbnails:
+                name = deserialize_image_file(value).name
+                found.append((name, _file_size(default.storage, name)))
+            if not dry_run:
+                default.kvstore.delete(source)
+            for name, size in found:
+                yield THUMBNAIL, name, size
+
+
+def collect_unregistered_thumbnails(dry_run=False):
+    '''
+    Yield and delete thumbnail files missing from the kvstore
+    '''
+    directory = thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/')
+    files = _old(walk(default.storage, directory))
+    for batch in batches(files, settings.MEDIA_GC_BATCH_SIZE):
+        keys = {
+            add_prefix(ImageFile(name, default.storage).key): (name, stat)
+            for name, stat in batch
+        }
+        registered = set(
+            KVStore.objects
+            .filter(key__in=keys)
+            .values_list('key', flat=True)
+        )
+        for key, (name, stat) in keys.items():
+            if key in registered:
+                continue
+            if not dry_run:
+                default.storage.delete(name)
+            yield THUMBNAIL, name, stat.st_size
+
+
+def collect(dry_run=False):
+    '''
+    Yield (kind, name, size) of every deleted file, with dry_run
+    only report them. Originals go first, so their thumbnails become
+    stale in the same run
+    '''
+    for directory in settings.MEDIA_GC_DIRS:
+        yield from collect_originals(directory, dry_run)
+    yield from collect_stale_thumbnails(dry_run)
+    yield from collect_unregistered_thumbnails(dry_run)
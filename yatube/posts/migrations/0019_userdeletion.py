@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_trendingscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDeletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, verbose_name='Имя пользователя')),
+                ('stage', models.CharField(choices=[('comments', 'Комментарии пользователя'), ('post_comments', 'Комментарии к постам'), ('follows', 'Подписки'), ('digests', 'Сводки'), ('posts', 'Посты'), ('user', 'Пользователь'), ('done', 'Завершено')], default='comments', max_length=20, verbose_name='Этап')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Объектов к удалению')),
+                ('deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено объектов')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('user', models.OneToOneField(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:50
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+# копия posts.models.make_excerpt на момент миграции: позже правила
+# могут измениться, а миграция должна давать тот же результат
+EXCERPT_LENGTH = 300
+LAST_WORD_RE = re.compile(r'\s+\S*$')
+
+
+def make_excerpt(text):
+    if len(text) <= EXCERPT_LENGTH:
+        return text, False
+    excerpt = text[:EXCERPT_LENGTH + 1]
+    last_word = LAST_WORD_RE.search(excerpt)
+    if last_word is not None and last_word.start() > EXCERPT_LENGTH // 2:
+        excerpt = excerpt[:last_word.start()]
+    return excerpt[:EXCERPT_LENGTH].rstrip(), True
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    batch = []
+    posts = Post.objects.only('id', 'text').iterator(chunk_size=BATCH_SIZE)
+    for post in posts:
+        post.excerpt, post.excerpt_truncated = make_excerpt(post.text)
+        batch.append(post)
+        if len(batch) >= BATCH_SIZE:
+            Post.objects.bulk_update(batch, ('excerpt', 'excerpt_truncated'))
+            batch = []
+    Post.objects.bulk_update(batch, ('excerpt', 'excerpt_truncated'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_userdeletion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Начало текста для лент'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее начала'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
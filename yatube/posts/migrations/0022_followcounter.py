@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:25
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def fill_counters(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    FollowCounter = apps.get_model('posts', 'FollowCounter')
+    counters = {}
+    for field, owner in (('followers', 'author'), ('followees', 'user')):
+        rows = (
+            Follow.objects
+            .order_by()
+            .values(owner)
+            .annotate(count=Count('id'))
+            .values_list(owner, 'count')
+        )
+        for user_id, count in rows.iterator():
+            counter = counters.setdefault(
+                user_id, FollowCounter(user_id=user_id)
+            )
+            setattr(counter, field, count)
+    FollowCounter.objects.bulk_create(counters.values(),
+                                      batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0021_rendered_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follow_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('followees', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,45 @@
 
+import re
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from . import markup
+
 User = get_user_model()
 CROP_LEN_TEXT = settings.CROP_LEN_TEXT
+LAST_WORD_RE = re.compile(r'\s+\S*$')
+
+
+def make_excerpt(text):
+    '''
+    Return beginning of text cut at a word boundary and whether text
+    is longer than it
+    '''
+    length = settings.POST_EXCERPT_LENGTH
+    if len(text) <= length:
+        return text, False
+    excerpt = text[:length + 1]
+    last_word = LAST_WORD_RE.search(excerpt)
+    if last_word is not None and last_word.start() > length // 2:
+        excerpt = excerpt[:last_word.start()]
+    return excerpt[:length].rstrip(), True
+
+
+def save_rendered(instance, save_kwargs):
+    '''
+    Render text of the instance being saved unless text is deferred,
+    extend update_fields of save() with the rendered fields
+    '''
+    if 'text' in instance.get_deferred_fields():
+        return
+    instance.render_text()
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None and 'text' in update_fields:
+        save_kwargs['update_fields'] = {
+            *update_fields, *instance.RENDERED_FIELDS,
+        }
 
 
 class CreateModel(models.Model):
@@ -43,6 +78,31 @@ class Post(CreateModel):
         help_text='Введите текст поста',
         verbose_name='Текст поста',
     )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Начало текста для лент',
+    )
+    excerpt_truncated = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Текст длиннее начала',
+    )
+    excerpt_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='HTML начала текста',
+    )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='HTML текста',
+    )
+    html_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия правил HTML',
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -63,12 +123,57 @@ class Post(CreateModel):
         blank=True,
         verbose_name='Картинка',
     )
+    image_width = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Ширина картинки',
+    )
+    image_height = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Высота картинки',
+    )
+    image_format = models.CharField(
+        max_length=10,
+        blank=True,
+        editable=False,
+        verbose_name='Формат картинки',
+    )
+    image_bytes = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Размер картинки в байтах',
+    )
 
     class Meta:
         ordering = ('-created',)
 
     def __str__(self):
-        return self.text[:CROP_LEN_TEXT]
+        # text может быть отложен в лентах, начало всегда загружено
+        return (self.excerpt or self.text)[:CROP_LEN_TEXT]
+
+    RENDERED_FIELDS = ('excerpt', 'excerpt_truncated', 'excerpt_html',
+                       'text_html', 'html_version')
+
+    def render_text(self):
+        self.excerpt, self.excerpt_truncated = make_excerpt(self.text)
+        self.excerpt_html = markup.render(self.excerpt)
+        self.text_html = markup.render(self.text)
+        self.html_version = markup.VERSION
+
+    @property
+    def rendered_text(self):
+        return markup.rendered(self.text_html, self.html_version,
+                               self.text)
+
+    @property
+    def rendered_excerpt(self):
+        return markup.rendered(self.excerpt_html, self.html_version,
+                               self.excerpt)
+
+    def save(self, *args, **kwargs):
+        save_rendered(self, kwargs)
+        super().save(*args, **kwargs)
 
 
 class Comment(CreateModel):
@@ -78,6 +183,16 @@ class Comment(CreateModel):
         help_text='Комментрий к посту',
         verbose_name='Комментарий',
     )
+    text_html = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='HTML комментария',
+    )
+    html_version = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия правил HTML',
+    )
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -94,9 +209,24 @@ class Comment(CreateModel):
     class Meta:
         ordering = ('-created',)
 
+    RENDERED_FIELDS = ('text_html', 'html_version')
+
     def __str__(self):
         return self.text[:CROP_LEN_TEXT]
 
+    def render_text(self):
+        self.text_html = markup.render(self.text)
+        self.html_version = markup.VERSION
+
+    @property
+    def rendered_text(self):
+        return markup.rendered(self.text_html, self.html_version,
+                               self.text)
+
+    def save(self, *args, **kwargs):
+        save_rendered(self, kwargs)
+        super().save(*args, **kwargs)
+
 
 class Follow(models.Model):
     verbose_name = 'Подписка'
@@ -115,6 +245,16 @@ class Follow(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['author', 'id'],
+                name='follow_author_id_idx',
+            ),
+            models.Index(
+                fields=['user', 'id'],
+                name='follow_user_id_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'],
@@ -125,3 +265,149 @@ class Follow(models.Model):
                 name='check_self_follow'
             )
         ]
+
+
+class FollowCounter(models.Model):
+    verbose_name = 'Счетчик подписок'
+    verbose_name_plural = 'Счетчики подписок'
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='follow_counter',
+        verbose_name='Пользователь',
+    )
+    followers = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков',
+    )
+    followees = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок',
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.followers}/{self.followees}'
+
+
+class Digest(models.Model):
+    verbose_name = 'Сводка'
+    verbose_name_plural = 'Сводки'
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='digests',
+        verbose_name='Получатель',
+    )
+    period_start = models.DateTimeField(
+        verbose_name='Начало периода',
+    )
+    period_end = models.DateTimeField(
+        verbose_name='Конец периода',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Новых постов',
+    )
+    authors = models.TextField(
+        verbose_name='Авторы',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+
+    class Meta:
+        ordering = ('-period_end',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'period_end'],
+                name='unique_user_digest_period',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} {self.period_end:%Y-%m-%d %H:%M}'
+
+
+class TrendingScore(models.Model):
+    verbose_name = 'Рейтинг поста'
+    verbose_name_plural = 'Рейтинги постов'
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    score = models.FloatField(
+        db_index=True,
+        verbose_name='Логарифм затухающей суммы событий',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата обновления',
+    )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
+class UserDeletion(models.Model):
+    COMMENTS = 'comments'
+    POST_COMMENTS = 'post_comments'
+    FOLLOWS = 'follows'
+    DIGESTS = 'digests'
+    POSTS = 'posts'
+    USER = 'user'
+    DONE = 'done'
+    STAGE_CHOICES = (
+        (COMMENTS, 'Комментарии пользователя'),
+        (POST_COMMENTS, 'Комментарии к постам'),
+        (FOLLOWS, 'Подписки'),
+        (DIGESTS, 'Сводки'),
+        (POSTS, 'Посты'),
+        (USER, 'Пользователь'),
+        (DONE, 'Завершено'),
+    )
+    verbose_name = 'Удаление пользователя'
+    verbose_name_plural = 'Удаления пользователей'
+    user = models.OneToOneField(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='deletion',
+        verbose_name='Пользователь',
+    )
+    username = models.CharField(
+        max_length=150,
+        verbose_name='Имя пользователя',
+    )
+    stage = models.CharField(
+        max_length=20,
+        choices=STAGE_CHOICES,
+        default=COMMENTS,
+        verbose_name='Этап',
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Объектов к удалению',
+    )
+    deleted = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено объектов',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания',
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Дата завершения',
+    )
+
+    class Meta:
+        ordering = ('-created',)
+
+    def __str__(self):
+        return self.username
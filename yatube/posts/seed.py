@@ -0,0 +1,390 @@
+import io
+import math
+import random
+from datetime import timedelta
+from multiprocessing import Pool
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.storage import acquire
+
+from . import follow_graph
+from .models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'котик утро город море дорога книга музыка лес дождь солнце поезд '
+    'кофе работа друг вечер снег горы река небо письмо окно сад мост '
+    'праздник фото прогулка осень весна лето зима ветер звезда песня'
+).split()
+GROUP_SHARE = 0.7
+BURST_SIZE = 200
+# средняя задержка комментария после окна поста, в секундах
+COMMENT_DELAY = 2 * 60 * 60
+FOLLOW_ALPHA = 2.0
+# тексты берутся из заранее собранного пула, генерация слов на каждую
+# строку занимает больше времени, чем вставка
+TEXT_POOL = 4096
+# в пуле хранятся и производные поля, которые Post.save и Comment.save
+# заполняют по тексту
+POST_TEXT_FIELDS = ('text', *Post.RENDERED_FIELDS)
+COMMENT_TEXT_FIELDS = ('text', *Comment.RENDERED_FIELDS)
+# Синтетическую базу не жалко потерять при сбое, зато вставка вдвое быстрее,
+# ссылки генерируются заведомо целыми, поэтому внешние ключи не проверяются
+SQLITE_PRAGMAS = (
+    'foreign_keys = OFF',
+    'synchronous = OFF',
+    'journal_mode = MEMORY',
+    'cache_size = -262144',
+    'temp_store = MEMORY',
+)
+
+_plan = _base = _as_string = None
+_post_texts = _comment_texts = ()
+
+
+class Plan:
+    '''
+    Sizes, id offsets and random parameters shared by all batch workers
+    '''
+    def __init__(self, seed, users, groups, posts, comments, follows,
+                 image_ratio, batch_size, days):
+        self.seed = seed
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.follows = follows
+        self.image_ratio = image_ratio
+        self.batch_size = batch_size
+        self.end = timezone.now()
+        self.start = self.end - timedelta(days=days)
+        self.images = []
+        rng = random.Random(f'{seed}:plan')
+        self.user_step = _coprime(rng, users)
+        self.post_step = _coprime(rng, posts)
+        self.first_user = _next_id(User)
+        self.first_group = _next_id(Group)
+        self.first_post = _next_id(Post)
+
+    def batches(self, total):
+        return math.ceil(total / self.batch_size)
+
+    def post_window(self, offset):
+        '''
+        Posts of one batch are spread over their own slice of the period,
+        so ids grow with time
+        '''
+        width = ((self.end - self.start).total_seconds()
+                 / max(self.batches(self.posts), 1))
+        batch = offset // self.batch_size
+        return batch * width, width
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _coprime(rng, total):
+    '''
+    Random step which walks over all of range(total), used as a cheap
+    deterministic shuffle of Zipf ranks
+    '''
+    while True:
+        step = rng.randrange(1, max(total, 2) * 7 + 1) | 1
+        if math.gcd(step, total) == 1:
+            return step
+
+
+def _zipf(rng, total, step):
+    '''
+    Offset in range(total) with Zipf (s=1) popularity of its rank
+    '''
+    rank = int((total + 1) ** rng.random()) - 1
+    return min(rank, total - 1) * step % total
+
+
+def _timestamp(seconds):
+    value = _base + timedelta(seconds=seconds)
+    return str(value) if _as_string else value
+
+
+def _init(plan):
+    '''
+    Prepare worker: backends which store datetimes as strings get a naive
+    base in the connection time zone, so rows skip per-value adaptation
+    '''
+    global _plan, _base, _as_string, _post_texts, _comment_texts
+    _plan = plan
+    _base = plan.start
+    _as_string = isinstance(
+        connection.ops.adapt_datetimefield_value(plan.start), str
+    )
+    if _as_string and timezone.is_aware(_base):
+        _base = timezone.make_naive(_base, connection.timezone)
+    rng = random.Random(f'{plan.seed}:texts')
+    _post_texts = []
+    _comment_texts = []
+    for _ in range(TEXT_POOL):
+        post = Post(text=_text(rng, 5, 60))
+        post.render_text()
+        _post_texts.append(
+            tuple(getattr(post, field) for field in POST_TEXT_FIELDS)
+        )
+        comment = Comment(text=_text(rng, 2, 20))
+        comment.render_text()
+        _comment_texts.append(
+            tuple(getattr(comment, field) for field in COMMENT_TEXT_FIELDS)
+        )
+
+
+def _rng(table, batch):
+    return random.Random(f'{_plan.seed}:{table}:{batch}')
+
+
+def _text(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def user_rows(batch):
+    rng = _rng('users', batch)
+    span = (_plan.end - _plan.start).total_seconds()
+    first = batch * _plan.batch_size
+    rows = []
+    for offset in range(first, min(first + _plan.batch_size, _plan.users)):
+        user_id = _plan.first_user + offset
+        rows.append((
+            user_id, f'!seed{user_id}', False, f'seed_user_{user_id}',
+            rng.choice(WORDS).capitalize(), '', '', False, True,
+            _timestamp(rng.uniform(0, span)),
+        ))
+    return rows, {}
+
+
+def follow_rows(batch):
+    '''
+    Power-law number of followees, popular authors are followed more often
+    '''
+    rng = _rng('follows', batch)
+    scale = _plan.follows * (FOLLOW_ALPHA - 1) / FOLLOW_ALPHA
+    first = batch * _plan.batch_size
+    rows = []
+    for offset in range(first, min(first + _plan.batch_size, _plan.users)):
+        wanted = min(int(rng.paretovariate(FOLLOW_ALPHA) * scale),
+                     _plan.users - 1)
+        authors = set()
+        for _ in range(wanted * 2):
+            if len(authors) >= wanted:
+                break
+            author = _zipf(rng, _plan.users, _plan.user_step)
+            if author != offset:
+                authors.add(author)
+        user_id = _plan.first_user + offset
+        # по порядку уникального индекса (user, author) вставка быстрее
+        rows.extend(
+            (user_id, _plan.first_user + author) for author in sorted(authors)
+        )
+    return rows, {}
+
+
+def post_rows(batch):
+    '''
+    Zipf author activity and bursts of posts inside the batch window
+    '''
+    rng = _rng('posts', batch)
+    first = batch * _plan.batch_size
+    count = min(_plan.batch_size, _plan.posts - first)
+    window_start, width = _plan.post_window(first)
+    bursts = [rng.uniform(0, width) for _ in range(count // BURST_SIZE + 1)]
+    burst_width = width / len(bursts) / 10
+    times = sorted(
+        window_start + min(rng.choice(bursts)
+                           + rng.expovariate(1 / burst_width), width)
+        for _ in range(count)
+    )
+    images = {}
+    rows = []
+    for index, seconds in enumerate(times):
+        author = _zipf(rng, _plan.users, _plan.user_step)
+        group = None
+        if _plan.groups and rng.random() < GROUP_SHARE:
+            group = _plan.first_group + _zipf(rng, _plan.groups, 1)
+        image = ('', None, None, '', None)
+        if _plan.images and rng.random() < _plan.image_ratio:
+            image = rng.choice(_plan.images)
+            images[image[0]] = images.get(image[0], 0) + 1
+        rows.append((
+            _plan.first_post + first + index, _timestamp(seconds),
+            *rng.choice(_post_texts), _plan.first_user + author, group,
+            *image,
+        ))
+    return rows, images
+
+
+def comment_rows(batch):
+    '''
+    Popular posts get most comments, shortly after their window
+    '''
+    rng = _rng('comments', batch)
+    first = batch * _plan.batch_size
+    rows = []
+    for _ in range(min(_plan.batch_size, _plan.comments - first)):
+        post = _zipf(rng, _plan.posts, _plan.post_step)
+        window_start, width = _plan.post_window(post)
+        seconds = window_start + width + rng.expovariate(1 / COMMENT_DELAY)
+        rows.append((
+            _timestamp(seconds), *rng.choice(_comment_texts),
+            _plan.first_post + post,
+            _plan.first_user + _zipf(rng, _plan.users, _plan.user_step),
+        ))
+    return rows, {}
+
+
+TABLES = (
+    (User, ('id', 'password', 'is_superuser', 'username', 'first_name',
+            'last_name', 'email', 'is_staff', 'is_active', 'date_joined'),
+     'users', user_rows),
+    (Follow, ('user', 'author'), 'users', follow_rows),
+    (Post, ('id', 'created', *POST_TEXT_FIELDS, 'author', 'group',
+            'image', 'image_width', 'image_height', 'image_format',
+            'image_bytes'),
+     'posts', post_rows),
+    (Comment, ('created', *COMMENT_TEXT_FIELDS, 'post', 'author'),
+     'comments', comment_rows),
+)
+
+
+def insert_sql(model, fields):
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(model._meta.get_field(field).column) for field in fields
+    )
+    placeholders = ', '.join(['%s'] * len(fields))
+    return (f'INSERT INTO {quote(model._meta.db_table)} '
+            f'({columns}) VALUES ({placeholders})')
+
+
+def make_image_pool(plan, size):
+    '''
+    Store a few generated pictures, posts share them
+    '''
+    from PIL import Image
+
+    rng = random.Random(f'{plan.seed}:images')
+    for _ in range(size):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        image = Image.new('RGB', (640, 360), color)
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=80)
+        data = output.getvalue()
+        name = default_storage.save('posts/seed.jpg', ContentFile(data))
+        plan.images.append((name, 640, 360, 'JPEG', len(data)))
+
+
+def _settle_images(plan, uses):
+    # Каждый файл пула уже получил одну ссылку при сохранении
+    for name, _, _, _, size in plan.images:
+        count = uses.get(name, 0)
+        if count > 1:
+            sha256 = name.rsplit('/', 1)[-1].split('.')[0]
+            acquire(name, sha256, size, count=count - 1)
+        elif not count:
+            default_storage.delete(name)
+
+
+def _drop_sqlite_indexes(cursor):
+    '''
+    Drop secondary indexes of seeded tables and return statements which
+    recreate them: building an index once is much faster than updating it
+    on every insert. Unique constraints stay in place
+    '''
+    tables = [model._meta.db_table for model, _, _, _ in TABLES]
+    cursor.execute(
+        'SELECT name, sql FROM sqlite_master WHERE type = %s '
+        'AND sql IS NOT NULL AND tbl_name IN ({})'.format(
+            ', '.join(['%s'] * len(tables))
+        ),
+        ['index', *tables],
+    )
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    return [sql for _, sql in indexes]
+
+
+def _load(cursor, pool, plan, report):
+    inserted = {}
+    uses = {}
+    for model, fields, size, generate in TABLES:
+        sql = insert_sql(model, fields)
+        batches = range(plan.batches(getattr(plan, size)))
+        results = (pool.imap(generate, batches) if pool
+                   else map(generate, batches))
+        inserted[model.__name__] = 0
+        for rows, batch_uses in results:
+            with transaction.atomic():
+                cursor.executemany(sql, rows)
+            inserted[model.__name__] += len(rows)
+            for name, count in batch_uses.items():
+                uses[name] = uses.get(name, 0) + count
+            if report:
+                report(model.__name__, inserted[model.__name__])
+    return inserted, uses
+
+
+def seed(plan, workers=0, images=0, report=None):
+    '''
+    Generate batches in worker processes and insert them with executemany:
+    bulk_create would overwrite generated dates through auto_now_add and
+    is limited by SQLite to 999 parameters per query.
+    Return {model name: inserted rows}
+    '''
+    Group.objects.bulk_create(
+        Group(
+            id=plan.first_group + offset,
+            title=f'Группа {plan.first_group + offset}',
+            slug=f'seed-{plan.first_group + offset}',
+            description=_text(random.Random(f'{plan.seed}:group:{offset}'),
+                              5, 30),
+        )
+        for offset in range(plan.groups)
+    )
+    if images:
+        make_image_pool(plan, images)
+    pool = None
+    if workers:
+        # Воркерам не нужно соединение с базой родителя
+        connections.close_all()
+        pool = Pool(workers, _init, (plan,))
+    _init(plan)
+    indexes = []
+    try:
+        with connection.cursor() as cursor:
+            # внутри транзакции часть PRAGMA запрещена
+            pragmas = (connection.vendor == 'sqlite'
+                       and not connection.in_atomic_block)
+            if pragmas:
+                for pragma in SQLITE_PRAGMAS:
+                    cursor.execute(f'PRAGMA {pragma}')
+            if connection.vendor == 'sqlite':
+                existing = plan.first_user + plan.first_post
+                if plan.users + plan.posts > existing:
+                    indexes = _drop_sqlite_indexes(cursor)
+            try:
+                inserted, uses = _load(cursor, pool, plan, report)
+            finally:
+                for sql in indexes:
+                    cursor.execute(sql)
+                if pragmas:
+                    cursor.execute('PRAGMA foreign_keys = ON')
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    _settle_images(plan, uses)
+    # вставка в обход модели не вызывает сигналы Follow
+    follow_graph.fill_counters(User.objects.filter(id__gte=plan.first_user))
+    return {Group.__name__: plan.groups, **inserted}
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import follow_graph, group_directory, markup, trending
+from .jobs import RENDERED_MODELS
+from .models import Comment, Follow, Group
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.edge_added(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.edge_removed(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    group_directory.group_changed()
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        trending.add_event(instance.post_id, instance.created,
+                           settings.TRENDING_COMMENT_WEIGHT)
+
+
+def _fully_migrated(using):
+    '''
+    Migrate to an older migration or a partial migrate leaves
+    tables and columns of the current models missing
+    '''
+    loader = MigrationLoader(connections[using])
+    return all(
+        node in loader.applied_migrations
+        for node in loader.graph.leaf_nodes()
+    )
+
+
+@receiver(post_migrate)
+def rerender_stale_html(sender, app_config, using, **kwargs):
+    # новая версия правил приходит с деплоем, после которого идет migrate
+    if app_config.name == 'posts' and _fully_migrated(using):
+        markup.schedule(RENDERED_MODELS)
@@ -0,0 +1,26 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+@override_settings(NPLUSONE_MODE='raise')
+class PostsTestCase(TestCase):
+    '''
+    N+1 in requests of the test client fails the test
+    '''
+    def _pre_setup(self):
+        super()._pre_setup()
+        # общий кэш переживает откат транзакции теста
+        caches['shared'].clear()
+
+    def run_on_commit(self):
+        '''
+        Run callbacks waiting for commit of the test transaction,
+        which is never committed
+        '''
+        # колбэки могут отложить новые, как удаление файлов в хранилище
+        while connection.run_on_commit:
+            callbacks = connection.run_on_commit
+            connection.run_on_commit = []
+            for _, callback in callbacks:
+                callback()
@@ -0,0 +1,115 @@
+from django.contrib.auth.models import Permission
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from . import PostsTestCase
+from .. import deletion
+from ..models import Comment, Follow, Post, User, UserDeletion
+
+POSTS = 7
+
+
+@override_settings(USER_DELETION_BATCH_SIZE=3)
+class UserDeletionTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='password',
+        )
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='prolific')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=self.user)
+            for number in range(POSTS)
+        )
+        self.post = self.user.posts.first()
+        self.reader_post = Post.objects.create(text='Чужой пост',
+                                               author=self.reader)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий читателя')
+        self.comment = Comment.objects.create(post=self.reader_post,
+                                              author=self.user,
+                                              text='Комментарий автора')
+        Follow.objects.create(user=self.reader, author=self.user)
+        Follow.objects.create(user=self.user, author=self.reader)
+
+    def test_start_hides_content(self):
+        deletion.start(self.user)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        self.assertNotIn(self.post, response.context['page_obj'])
+        for url in (
+            reverse('posts:post_detail', args=(self.post.id,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 404)
+        response = client.get(
+            reverse('posts:post_detail', args=(self.reader_post.id,))
+        )
+        self.assertNotIn(self.comment, response.context['page_obj'])
+
+    def test_jobs_delete_content_in_batches(self):
+        user_deletion = deletion.start(self.user)
+        self.assertEqual(user_deletion.total, POSTS + 4 + 1)
+        processed = jobs.run_pending()
+        self.assertGreater(processed, POSTS // 3)
+        user_deletion.refresh_from_db()
+        self.assertEqual(user_deletion.stage, UserDeletion.DONE)
+        self.assertEqual(user_deletion.deleted, user_deletion.total)
+        self.assertIsNotNone(user_deletion.finished)
+        self.assertIsNone(user_deletion.user)
+        self.assertFalse(User.objects.filter(username='prolific').exists())
+        self.assertFalse(Comment.objects.filter(author__username='prolific')
+                         .exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(Post.objects.filter(pk=self.reader_post.pk).exists())
+
+    def test_start_twice_enqueues_one_job(self):
+        deletion.start(self.user)
+        deletion.start(self.user)
+        self.assertEqual(
+            Job.objects.filter(name=deletion.JOB_NAME).count(),
+            1,
+        )
+
+    def test_admin_delete_is_deferred(self):
+        client = Client()
+        client.force_login(self.admin)
+        url = reverse('admin:auth_user_delete', args=(self.user.pk,))
+        response = client.get(url)
+        self.assertContains(response, 'Посты: 7')
+        client.post(url, {'post': 'yes'})
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertTrue(Post.objects.filter(author=self.user).exists())
+        self.assertTrue(
+            UserDeletion.objects.filter(user=self.user).exists()
+        )
+
+    def test_admin_delete_requires_content_permissions(self):
+        moderator = User.objects.create_user(username='moderator',
+                                             is_staff=True)
+        moderator.user_permissions.set(Permission.objects.filter(
+            codename__in=('view_user', 'delete_user', 'delete_comment'),
+        ))
+        client = Client()
+        client.force_login(moderator)
+        url = reverse('admin:auth_user_delete', args=(self.user.pk,))
+        response = client.get(url)
+        self.assertEqual(
+            response.context['perms_lacking'],
+            {Post._meta.verbose_name, Follow._meta.verbose_name},
+        )
+        response = client.post(url, {'post': 'yes'})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(UserDeletion.objects.filter(user=self.user).exists())
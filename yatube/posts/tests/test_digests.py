@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+from . import PostsTestCase
+from ..digests import JOB_NAME, build_digests
+from ..models import Digest, Follow, Post, User
+
+
+class DigestTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author_1 = User.objects.create_user(username='author_1')
+        cls.author_2 = User.objects.create_user(username='author_2')
+        cls.quiet_author = User.objects.create_user(username='quiet')
+        cls.readers = [
+            User.objects.create_user(
+                username=f'reader_{i}',
+                email=f'reader_{i}@example.com',
+            ) for i in range(5)
+        ]
+        Follow.objects.bulk_create(
+            [Follow(user=reader, author=cls.author_1)
+             for reader in cls.readers]
+            + [Follow(user=cls.readers[0], author=cls.author_2),
+               Follow(user=cls.readers[1], author=cls.quiet_author)]
+        )
+        for author in (cls.author_1, cls.author_1, cls.author_2):
+            Post.objects.create(text='new post', author=author)
+        cls.since = timezone.now() - timedelta(hours=1)
+        cls.until = timezone.now() + timedelta(seconds=1)
+
+    def test_digest_per_follower(self):
+        build_digests(DigestTests.since, DigestTests.until)
+        digest = Digest.objects.get(user=DigestTests.readers[0])
+        self.assertEqual(digest.posts_count, 3)
+        self.assertEqual(digest.authors, 'author_1, author_2')
+        self.assertEqual(
+            Digest.objects.get(user=DigestTests.readers[1]).posts_count,
+            2,
+        )
+        self.assertEqual(Digest.objects.count(), 5)
+        self.assertEqual(len(mail.outbox), 0)
+        self.run_on_commit()
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_repeated_run_sends_nothing(self):
+        build_digests(DigestTests.since, DigestTests.until)
+        self.run_on_commit()
+        build_digests(DigestTests.since, DigestTests.until)
+        self.run_on_commit()
+        self.assertEqual(Digest.objects.count(), 5)
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_query_count_does_not_depend_on_followers(self):
+        # авторы, подписчики, связи, имена авторов, готовые сводки,
+        # сводки, адреса и пустая следующая порция
+        with self.assertNumQueries(8):
+            build_digests(DigestTests.since, DigestTests.until)
+
+    @override_settings(DIGEST_CHUNK=2, DIGEST_TIME_BUDGET=-1)
+    def test_time_budget_continues_in_job(self):
+        build_digests(DigestTests.since, DigestTests.until)
+        self.assertEqual(Digest.objects.count(), 2)
+        jobs.run_pending()
+        self.assertEqual(Digest.objects.count(), 5)
+
+    def test_periodic_job_reschedules_itself(self):
+        jobs.enqueue(JOB_NAME)
+        jobs.run_pending()
+        self.assertEqual(Digest.objects.count(), 5)
+        next_run = Job.objects.get(name=JOB_NAME)
+        self.assertGreater(next_run.run_at, timezone.now())
+
+    def test_inbox_page(self):
+        build_digests(DigestTests.since, DigestTests.until)
+        client = Client()
+        client.force_login(DigestTests.readers[0])
+        response = client.get(reverse('posts:digests'))
+        self.assertEqual(len(response.context['page_obj']), 1)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.test import override_settings
+
+from . import PostsTestCase
+from .. import follow_graph
+from ..models import Follow, User
+
+
+class FollowGraphTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{i}')
+            for i in range(3)
+        ]
+
+    def test_graph_follows_model_changes(self):
+        author_1, author_2, author_3 = FollowGraphTests.authors
+        reader = FollowGraphTests.reader
+        self.assertFalse(follow_graph.is_following(reader.id, author_1.id))
+        Follow.objects.create(user=reader, author=author_2)
+        Follow.objects.create(user=reader, author=author_1)
+        self.run_on_commit()
+        self.assertEqual(
+            list(follow_graph.followees(reader.id)),
+            sorted([author_1.id, author_2.id]),
+        )
+        Follow.objects.filter(user=reader, author=author_2).delete()
+        self.run_on_commit()
+        self.assertTrue(follow_graph.is_following(reader.id, author_1.id))
+        self.assertFalse(follow_graph.is_following(reader.id, author_2.id))
+        self.assertFalse(follow_graph.is_following(reader.id, author_3.id))
+
+    def test_reads_do_not_touch_db(self):
+        author = FollowGraphTests.authors[0]
+        reader = FollowGraphTests.reader
+        Follow.objects.create(user=reader, author=author)
+        self.run_on_commit()
+        follow_graph.followees(reader.id)
+        with self.assertNumQueries(0):
+            self.assertTrue(follow_graph.is_following(reader.id, author.id))
+
+    def test_counters_follow_model_changes(self):
+        author_1, author_2, _ = FollowGraphTests.authors
+        reader = FollowGraphTests.reader
+        Follow.objects.create(user=reader, author=author_1)
+        Follow.objects.create(user=reader, author=author_2)
+        Follow.objects.create(user=author_2, author=author_1)
+        self.assertEqual(follow_graph.counts(author_1.id), (2, 0))
+        self.assertEqual(follow_graph.counts(author_2.id), (1, 1))
+        self.assertEqual(follow_graph.counts(reader.id), (0, 2))
+        Follow.objects.filter(author=author_1).delete()
+        self.assertEqual(follow_graph.counts(author_1.id), (0, 0))
+        self.assertEqual(follow_graph.counts(reader.id), (0, 1))
+        with self.assertNumQueries(1):
+            follow_graph.counts(reader.id)
+
+    def test_fill_counters_after_bulk_insert(self):
+        author = FollowGraphTests.authors[0]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in (FollowGraphTests.reader, *FollowGraphTests.authors)
+            if user != author
+        )
+        follow_graph.fill_counters(User.objects.all())
+        self.assertEqual(follow_graph.counts(author.id), (3, 0))
+        self.assertEqual(follow_graph.counts(FollowGraphTests.reader.id),
+                         (0, 1))
+
+    def test_large_ids(self):
+        reader = FollowGraphTests.reader
+        author = User.objects.create_user(id=2 ** 33, username='far_author')
+        Follow.objects.create(user=reader, author=author)
+        self.run_on_commit()
+        self.assertTrue(follow_graph.is_following(reader.id, author.id))
+
+    def test_uncommitted_change_keeps_cache(self):
+        author = FollowGraphTests.authors[0]
+        reader = FollowGraphTests.reader
+        self.assertFalse(follow_graph.is_following(reader.id, author.id))
+        Follow.objects.create(user=reader, author=author)
+        with self.assertNumQueries(0):
+            self.assertFalse(follow_graph.is_following(reader.id, author.id))
+
+    def test_change_in_other_process_is_seen(self):
+        author = FollowGraphTests.authors[0]
+        reader = FollowGraphTests.reader
+        self.assertFalse(follow_graph.is_following(reader.id, author.id))
+        # другой воркер: свой LocMemCache, общий только кэш shared
+        other_worker_caches = {
+            **settings.CACHES,
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'other-worker',
+            },
+        }
+        with override_settings(CACHES=other_worker_caches):
+            Follow.objects.create(user=reader, author=author)
+            self.run_on_commit()
+        self.assertTrue(follow_graph.is_following(reader.id, author.id))
+
+    def test_anonymous_and_self(self):
+        author = FollowGraphTests.authors[0]
+        self.assertFalse(follow_graph.is_following(None, author.id))
+        self.assertFalse(follow_graph.is_following(author.id, author.id))
@@ -1,19 +1,32 @@
+import hashlib
+import io
 import shutil
 import tempfile
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import Client, override_settings
 from django.urls import reverse
+from PIL import Image
 
+from core.models import StoredFile
+from core.storage import content_name
+from . import PostsTestCase
 from ..forms import PostForm
 from ..models import Group, Post, User
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+def make_gif(name, color):
+    output = io.BytesIO()
+    Image.new('RGB', (2, 2), color).save(output, 'GIF')
+    return SimpleUploadedFile(name, output.getvalue(),
+                              content_type='image/gif')
+
+
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostFormTest(TestCase):
+class PostFormTest(PostsTestCase):
     @classmethod
     def setUpClass(cls):
         print('TEMP_MEDIA_ROOT: ', TEMP_MEDIA_ROOT)
@@ -36,6 +49,7 @@ class PostFormTest(TestCase):
             b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
             b'\x02\x4c\x01\x00\x3b'
         )
+        cls.small_gif = small_gif
         cls.uploaded = SimpleUploadedFile(
             'small.gif',
             small_gif,
@@ -80,7 +94,11 @@ class PostFormTest(TestCase):
             latest_post.text == form_data['text'],
             latest_post.group.id == form_data['group'],
             latest_post.author == PostFormTest.new_user_1,
-            latest_post.image == f'posts/{PostFormTest.uploaded}'
+            latest_post.image == content_name(
+                'posts',
+                hashlib.sha256(PostFormTest.small_gif).hexdigest(),
+                '.gif',
+            ),
         ]))
 
     def test_change_post(self):
@@ -112,6 +130,23 @@ class PostFormTest(TestCase):
             changed_post.text, form_data['text']
         )
 
+    def test_replaced_image_is_released(self):
+        post = Post.objects.create(
+            text='post with image',
+            author=PostFormTest.new_user_1,
+            image=make_gif('old.gif', 'red'),
+        )
+        old_name = post.image.name
+        self.authorize_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': post.text, 'image': make_gif('new.gif', 'blue')},
+        )
+        self.run_on_commit()
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, old_name)
+        self.assertFalse(StoredFile.objects.filter(name=old_name).exists())
+        self.assertFalse(post.image.storage.exists(old_name))
+
     def test_comment_post(self):
         count_comments = PostFormTest.post_1.comments.count()
         form_data = {
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import override_settings
+from django.urls import reverse
+
+from . import PostsTestCase
+from .. import group_directory
+from ..forms import PostForm
+from ..models import Group, Post, User
+
+
+class GroupDirectoryTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='directory',
+            description='Описание',
+        )
+        cls.user = User.objects.create_user(username='directory_author')
+        Post.objects.create(text='Пост', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+
+    def test_lookups_without_queries(self):
+        group_directory.groups()
+        with self.assertNumQueries(0):
+            self.assertEqual(group_directory.get_by_slug('directory'),
+                             self.group)
+            self.assertEqual(group_directory.get(self.group.pk), self.group)
+            self.assertIsNone(group_directory.get_by_slug('missing'))
+
+    def test_save_and_delete_invalidate(self):
+        group_directory.groups()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(group_directory.get(self.group.pk).title,
+                         'Новое название')
+        other = Group.objects.create(title='Другая', slug='other',
+                                     description='')
+        self.assertEqual(group_directory.get_by_slug('other'), other)
+        other.delete()
+        self.assertIsNone(group_directory.get_by_slug('other'))
+
+    def test_change_in_other_process_reloads(self):
+        group_directory.groups()
+        local_state = group_directory._state
+        # другой воркер: свой справочник и свой LocMemCache, общий только
+        # кэш shared
+        other_worker_caches = {
+            **settings.CACHES,
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'other-worker',
+            },
+        }
+        with override_settings(CACHES=other_worker_caches):
+            group_directory._state = (None, [], {}, {})
+            other = Group.objects.create(title='Другая', slug='other',
+                                         description='')
+            renamed = Group.objects.get(pk=self.group.pk)
+            renamed.title = 'Новое название'
+            renamed.save()
+        group_directory._state = local_state
+        self.assertEqual(group_directory.get_by_slug('other'), other)
+        self.assertEqual(group_directory.get(self.group.pk).title,
+                         'Новое название')
+
+    def test_post_form_choices_from_directory(self):
+        group_directory.groups()
+        form = PostForm(data={'text': 'Текст', 'group': self.group.pk})
+        with self.assertNumQueries(0):
+            self.assertIn((self.group.pk, str(self.group)),
+                          list(form.fields['group'].choices))
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.group)
+        form = PostForm(data={'text': 'Текст', 'group': 999})
+        self.assertFalse(form.is_valid())
+        self.assertIn('group', form.errors)
+
+    def test_group_posts_uses_directory(self):
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,))
+        )
+        self.assertEqual(response.context['group'], self.group)
+        post = response.context['page_obj'][0]
+        with self.assertNumQueries(0):
+            self.assertEqual(post.group.title, self.group.title)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:group_list', args=('missing',))
+            ).status_code,
+            404,
+        )
@@ -0,0 +1,193 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+from core.models import Job
+from . import PostsTestCase
+from ..forms import PostForm
+from ..images import normalize_post_image
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION_TAG = 0x0112
+ROTATED_90 = 6
+MAKE_TAG = 0x010F
+
+
+def make_jpeg(size, orientation=None, quality=100):
+    image = Image.effect_noise(size, 64).convert('RGB')
+    exif = Image.Exif()
+    exif[MAKE_TAG] = 'Camera'
+    if orientation:
+        exif[ORIENTATION_TAG] = orientation
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=quality, exif=exif.tobytes())
+    return output.getvalue()
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_PIPELINE_MAX_SIZE=(200, 200),
+)
+class ImagePipelineTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_normalize_downsizes_rotates_and_strips_exif(self):
+        post = Post.objects.create(
+            text='big photo',
+            author=ImagePipelineTests.user,
+            image=SimpleUploadedFile(
+                'photo.jpg',
+                make_jpeg((800, 400), orientation=ROTATED_90),
+                content_type='image/jpeg',
+            ),
+        )
+        original_name = post.image.name
+        saved = normalize_post_image(post.id)
+        post.refresh_from_db()
+        self.assertGreater(saved, 0)
+        self.assertNotEqual(post.image.name, original_name)
+        self.assertTrue(post.image.storage.exists(original_name))
+        self.run_on_commit()
+        self.assertFalse(post.image.storage.exists(original_name))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 200))
+            self.assertNotIn(ORIENTATION_TAG, image.getexif())
+            self.assertTrue(image.info.get('progressive'))
+
+    def test_rolled_back_normalize_keeps_original(self):
+        post = Post.objects.create(
+            text='photo',
+            author=ImagePipelineTests.user,
+            image=SimpleUploadedFile(
+                'photo.jpg',
+                make_jpeg((800, 400), orientation=ROTATED_90),
+                content_type='image/jpeg',
+            ),
+        )
+        original_name = post.image.name
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                normalize_post_image(post.id)
+                raise RuntimeError('database is locked')
+        self.run_on_commit()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, original_name)
+        self.assertTrue(post.image.storage.exists(original_name))
+
+    @override_settings(IMAGE_PIPELINE_QUALITY=100)
+    def test_normalize_strips_exif_when_not_smaller(self):
+        post = Post.objects.create(
+            text='small photo',
+            author=ImagePipelineTests.user,
+            image=SimpleUploadedFile(
+                'photo.jpg',
+                make_jpeg((80, 40), orientation=ROTATED_90, quality=10),
+                content_type='image/jpeg',
+            ),
+        )
+        original_name = post.image.name
+        self.assertLess(normalize_post_image(post.id), 0)
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, original_name)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (40, 80))
+            self.assertEqual(len(image.getexif()), 0)
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=100)
+    def test_form_rejects_huge_image(self):
+        form = PostForm(
+            data={'text': 'huge'},
+            files={'image': SimpleUploadedFile(
+                'huge.jpg',
+                make_jpeg((20, 20)),
+                content_type='image/jpeg',
+            )},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    def test_form_fills_image_metadata(self):
+        data = make_jpeg((30, 20))
+        form = PostForm(
+            data={'text': 'with metadata'},
+            files={'image': SimpleUploadedFile(
+                'meta.jpg',
+                data,
+                content_type='image/jpeg',
+            )},
+        )
+        self.assertTrue(form.is_valid())
+        post = form.save(commit=False)
+        post.author = ImagePipelineTests.user
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.image_width, post.image_height,
+             post.image_format, post.image_bytes),
+            (30, 20, 'JPEG', len(data)),
+        )
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            text='old post',
+            author=ImagePipelineTests.user,
+            image=SimpleUploadedFile('old.jpg', make_jpeg((40, 10))),
+        )
+        call_command('backfill_image_metadata', stdout=io.StringIO())
+        post.refresh_from_db()
+        self.assertEqual((post.image_width, post.image_height), (40, 10))
+
+    def test_thumbnail_uses_stored_geometry(self):
+        post = Post.objects.create(
+            text='stored geometry',
+            author=ImagePipelineTests.user,
+            image=SimpleUploadedFile('geometry.jpg', make_jpeg((40, 10))),
+            image_width=40,
+            image_height=10,
+        )
+        thumbnail = get_thumbnail(post.image, '20x5')
+        post.image_width = 4000
+        post.image_height = 1000
+        source = ImageFile(post.image)
+        default.kvstore.delete(source, delete_thumbnails=False)
+        # попадание не регистрирует source заново
+        get_thumbnail(post.image, '20x5')
+        self.assertIsNone(default.kvstore.get(source))
+        default.kvstore.delete(thumbnail, delete_thumbnails=False)
+        get_thumbnail(post.image, '20x5')
+        self.assertEqual(default.kvstore.get(source).size, [4000, 1000])
+
+    def test_create_view_enqueues_normalization(self):
+        self.client.force_login(ImagePipelineTests.user)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'queued photo',
+            'image': SimpleUploadedFile('queued.jpg', make_jpeg((400, 400))),
+        })
+        self.assertEqual(
+            list(Job.objects.values_list('name', flat=True)),
+            ['posts.normalize_image'],
+        )
+        jobs.run_pending()
+        post = Post.objects.get(text='queued photo')
+        self.assertEqual((post.image_width, post.image_height), (200, 200))
+        self.assertFalse(Job.objects.exists())
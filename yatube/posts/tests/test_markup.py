@@ -0,0 +1,103 @@
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import override_settings
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from . import PostsTestCase
+from .. import markup
+from ..jobs import RENDERED_MODELS
+from ..models import Comment, Post, User
+
+TEXT = '<b>жирный</b>\nвторая строка'
+HTML = '&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка'
+
+
+class RenderedHtmlTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        self.post = Post.objects.create(text=TEXT, author=self.user)
+        self.comment = Comment.objects.create(text=TEXT, post=self.post,
+                                              author=self.user)
+
+    def test_save_stores_html(self):
+        for obj in (self.post, self.comment):
+            with self.subTest(model=type(obj).__name__):
+                obj.refresh_from_db()
+                self.assertEqual(obj.text_html, HTML)
+                self.assertEqual(obj.html_version, markup.VERSION)
+        self.assertEqual(self.post.excerpt_html, HTML)
+
+    def test_update_fields_include_html(self):
+        self.post.text = 'новый текст'
+        self.post.save(update_fields=('text',))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'новый текст')
+
+    def test_pages_output_stored_html(self):
+        Post.objects.filter(pk=self.post.pk).update(
+            text_html='<i>сохраненный пост</i>',
+            excerpt_html='<i>сохраненное начало</i>',
+        )
+        Comment.objects.filter(pk=self.comment.pk).update(
+            text_html='<i>сохраненный комментарий</i>',
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertContains(response, '<i>сохраненный пост</i>')
+        self.assertContains(response, '<i>сохраненный комментарий</i>')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<i>сохраненное начало</i>')
+
+    def test_stale_html_is_rendered_on_read(self):
+        Post.objects.filter(pk=self.post.pk).update(text_html='',
+                                                    html_version=0)
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertContains(response, HTML)
+
+    @override_settings(HTML_RERENDER_BATCH_SIZE=1)
+    def test_stale_rows_are_rerendered_in_background(self):
+        Post.objects.create(text='еще пост', author=self.user)
+        Post.objects.update(text_html='', excerpt_html='', html_version=0)
+        Comment.objects.update(text_html='', html_version=0)
+        markup.schedule(RENDERED_MODELS)
+        markup.schedule(RENDERED_MODELS)
+        self.assertGreaterEqual(jobs.run_pending(), 3)
+        for model in RENDERED_MODELS.values():
+            with self.subTest(model=model.__name__):
+                self.assertFalse(
+                    model.objects.exclude(html_version=markup.VERSION)
+                    .exists()
+                )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, HTML)
+
+    def test_migrate_schedules_rerender(self):
+        Post.objects.update(html_version=0)
+        emit_post_migrate_signal(0, False, DEFAULT_DB_ALIAS)
+        self.assertTrue(
+            Job.objects.filter(name=markup.JOB_NAME).exists()
+        )
+
+    def test_partial_migrate_schedules_nothing(self):
+        Post.objects.update(html_version=0)
+        # откат posts на одну миграцию: таблиц и колонок текущих моделей
+        # в такой базе может не быть
+        (app, name), = MigrationLoader(connection).graph.leaf_nodes('posts')
+        MigrationRecorder.Migration.objects.filter(
+            app=app, name=name,
+        ).delete()
+        emit_post_migrate_signal(0, False, DEFAULT_DB_ALIAS)
+        self.assertFalse(
+            Job.objects.filter(name=markup.JOB_NAME).exists()
+        )
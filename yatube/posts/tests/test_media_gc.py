@@ -0,0 +1,100 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+
+from core.models import StoredFile
+from . import PostsTestCase
+from .. import media_gc
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_png(color):
+    output = io.BytesIO()
+    Image.new('RGB', (40, 20), color).save(output, 'PNG')
+    return ContentFile(output.getvalue(), name='photo.png')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    MEDIA_GC_MIN_AGE=-60,
+    MEDIA_GC_BATCH_SIZE=2,
+)
+class MediaGarbageCollectorTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='collector')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # kvstore sorl кэширует записи, откаченные после прошлого теста
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=make_png('red'),
+        )
+        self.old_name = self.post.image.name
+        self.old_thumbnail = get_thumbnail(self.post.image, '20x20').name
+        self.post.image = make_png('blue')
+        self.post.save()
+        self.kept_thumbnail = get_thumbnail(self.post.image, '20x20').name
+        self.stray_thumbnail = 'cache/00/00/stray.jpg'
+        default.storage.save(self.stray_thumbnail, ContentFile(b'stray'))
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_dry_run_only_reports(self):
+        found = {name for _, name, _ in media_gc.collect(dry_run=True)}
+        self.assertEqual(
+            found,
+            {self.old_name, self.old_thumbnail, self.stray_thumbnail},
+        )
+        for name in found:
+            self.assertTrue(self.exists(name), name)
+
+    def test_deletes_unreferenced_files_and_thumbnails(self):
+        call_command('media_gc', stdout=io.StringIO())
+        self.run_on_commit()
+        self.assertFalse(self.exists(self.old_name))
+        self.assertFalse(self.exists(self.old_thumbnail))
+        self.assertFalse(self.exists(self.stray_thumbnail))
+        self.assertFalse(
+            StoredFile.objects.filter(name=self.old_name).exists()
+        )
+        self.assertTrue(self.exists(self.post.image.name))
+        self.assertTrue(self.exists(self.kept_thumbnail))
+        self.assertTrue(default_storage.exists(self.post.image.name))
+        self.assertEqual(list(media_gc.collect()), [])
+
+    @override_settings(MEDIA_GC_MIN_AGE=60 * 60)
+    def test_keeps_recent_files(self):
+        self.assertEqual(
+            [name for _, name, _ in media_gc.collect()],
+            [self.old_thumbnail],
+        )
+        self.assertTrue(self.exists(self.old_name))
+
+    def test_walk_matches_sorted_names(self):
+        for name in ('posts/a.jpg', 'posts/a/b.jpg', 'posts/a-b.jpg'):
+            default_storage.save(name, ContentFile(name.encode()))
+        names = [name for name, _ in media_gc.walk(default_storage, 'posts')]
+        self.assertEqual(names, sorted(names))
@@ -1,14 +1,15 @@
 from django.conf import settings
-from django.test import TestCase
+from django.test import override_settings
 
-from ..models import Comment, Group, Post, User
+from . import PostsTestCase
+from ..models import Comment, Group, Post, User, make_excerpt
 from ..models import CROP_LEN_TEXT
 
 
 CROP_LEN_TEXT = settings.CROP_LEN_TEXT
 
 
-class PostModelTests(TestCase):
+class PostModelTests(PostsTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -62,3 +63,36 @@ class PostModelTests(TestCase):
                     PostModelTests.post._meta.get_field(field).help_text,
                     expected_value,
                 )
+
+
+@override_settings(POST_EXCERPT_LENGTH=20)
+class PostExcerptTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='excerpt_usr')
+
+    def test_make_excerpt_cuts_at_word_boundary(self):
+        cases = {
+            'короткий текст': ('короткий текст', False),
+            'первое второе третье четвертое': ('первое второе третье', True),
+            'первое второе\nтретьечетвертое': ('первое второе', True),
+            'а' * 30: ('а' * 20, True),
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(make_excerpt(text), expected)
+
+    def test_save_updates_excerpt(self):
+        post = Post.objects.create(text='коротко', author=self.user)
+        post.text = 'первое второе третье четвертое'
+        post.save(update_fields=('text',))
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'первое второе третье')
+        self.assertTrue(post.excerpt_truncated)
+
+    def test_str_does_not_load_deferred_text(self):
+        post = Post.objects.create(text='Т' * 40, author=self.user)
+        post = Post.objects.defer('text').get(pk=post.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(post), 'Т' * CROP_LEN_TEXT)
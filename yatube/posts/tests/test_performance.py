@@ -0,0 +1,188 @@
+import json
+import os
+import time
+
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import PostsTestCase
+from .. import group_directory
+from ..models import Comment, Follow, Group, Post, User
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'perf_baseline.json')
+# UPDATE_PERF_BASELINE=1 перезаписывает базовые значения
+UPDATE_BASELINE = os.environ.get('UPDATE_PERF_BASELINE') == '1'
+TIME_TOLERANCE = 3.0
+# запас в секундах на шум измерения быстрых view
+TIME_SLACK = 0.05
+TIME_RUNS = 5
+
+AUTHORS = 15
+POSTS_PER_AUTHOR = 20
+COMMENTS = 60
+
+
+class PerformanceTests(PostsTestCase):
+    '''
+    Upper bounds of queries per request and wall time of posts views
+    on a seeded database, cache is cleared before every request
+    '''
+    QUERY_LIMITS = {
+        'posts:index': 4,
+        'posts:group_list': 4,
+        'posts:profile': 7,
+        'posts:post_detail': 6,
+        # в пустом кэше еще один запрос загружает подписки
+        'posts:follow_index': 5,
+        'posts:post_create': 2,
+        'posts:post_edit': 3,
+        'posts:add_comment': 6,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='perf-group',
+            description='Описание',
+        )
+        User.objects.bulk_create(
+            User(username=f'perf_author_{number}')
+            for number in range(AUTHORS)
+        )
+        authors = list(
+            User.objects.filter(username__startswith='perf_author_')
+        )
+        cls.reader = User.objects.create_user(username='perf_reader')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author, group=cls.group)
+            for author in authors
+            for number in range(POSTS_PER_AUTHOR)
+        )
+        cls.author = authors[0]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in (cls.reader, cls.author)
+            for author in authors
+            if user != author
+        )
+        cls.post = cls.author.posts.first()
+        cls.quiet_post = cls.author.posts.last()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=authors[number % AUTHORS],
+                    text=f'Комментарий {number}')
+            for number in range(COMMENTS)
+        )
+        Comment.objects.create(post=cls.quiet_post, author=cls.reader,
+                               text='Комментарий')
+        with open(BASELINE_PATH) as baseline_file:
+            cls.baseline = json.load(baseline_file)
+        cls.timings = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINE:
+            with open(BASELINE_PATH, 'w') as baseline_file:
+                json.dump(cls.timings, baseline_file, indent=4,
+                          sort_keys=True)
+                baseline_file.write('\n')
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def requests(self):
+        post_id = self.post.id
+        return {
+            'posts:index': ('get', reverse('posts:index'), None),
+            'posts:group_list': (
+                'get', reverse('posts:group_list', args=(self.group.slug,)),
+                None,
+            ),
+            'posts:profile': (
+                'get', reverse('posts:profile', args=(self.author.username,)),
+                None,
+            ),
+            'posts:post_detail': (
+                'get', reverse('posts:post_detail', args=(post_id,)), None,
+            ),
+            'posts:follow_index': ('get', reverse('posts:follow_index'),
+                                   None),
+            'posts:post_create': ('get', reverse('posts:post_create'), None),
+            'posts:post_edit': (
+                'get', reverse('posts:post_edit', args=(post_id,)), None,
+            ),
+            'posts:add_comment': (
+                'post', reverse('posts:add_comment', args=(post_id,)),
+                {'text': 'Новый комментарий'},
+            ),
+        }
+
+    def clear_caches(self):
+        cache.clear()
+        caches['shared'].clear()
+        # справочник групп живет в процессе дольше кэша страниц
+        group_directory.groups()
+
+    def count_queries(self, method, url, data=None):
+        self.clear_caches()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+        self.assertLess(response.status_code, 400, url)
+        return len(queries)
+
+    def test_query_limits(self):
+        for name, (method, url, data) in self.requests().items():
+            with self.subTest(view=name):
+                self.assertLessEqual(
+                    self.count_queries(method, url, data),
+                    self.QUERY_LIMITS[name],
+                )
+
+    def test_queries_do_not_depend_on_page_size(self):
+        for name in ('posts:index', 'posts:group_list', 'posts:profile',
+                     'posts:post_detail', 'posts:follow_index'):
+            method, url, data = self.requests()[name]
+            with self.subTest(view=name):
+                with override_settings(POSTS_ON_PAGE=5):
+                    small_page = self.count_queries(method, url, data)
+                with override_settings(POSTS_ON_PAGE=50):
+                    large_page = self.count_queries(method, url, data)
+                self.assertEqual(small_page, large_page)
+
+    def test_queries_do_not_depend_on_comment_count(self):
+        self.assertEqual(
+            self.count_queries(
+                'get',
+                reverse('posts:post_detail', args=(self.post.id,)),
+            ),
+            self.count_queries(
+                'get',
+                reverse('posts:post_detail', args=(self.quiet_post.id,)),
+            ),
+        )
+
+    def test_wall_time_within_baseline(self):
+        for name, (method, url, data) in self.requests().items():
+            durations = []
+            for _ in range(TIME_RUNS):
+                self.clear_caches()
+                started = time.perf_counter()
+                getattr(self.client, method)(url, data)
+                durations.append(time.perf_counter() - started)
+            median = sorted(durations)[TIME_RUNS // 2]
+            self.timings[name] = round(median, 4)
+            if UPDATE_BASELINE:
+                continue
+            with self.subTest(view=name):
+                self.assertLessEqual(
+                    median,
+                    self.baseline[name] * TIME_TOLERANCE + TIME_SLACK,
+                    f'{name}: {median:.4f}s, '
+                    f'baseline {self.baseline[name]:.4f}s',
+                )
@@ -0,0 +1,55 @@
+from . import PostsTestCase
+from ..models import Comment, Follow, Group, Post, User
+from ..seed import Plan, seed
+
+
+def make_plan(seed_value):
+    return Plan(
+        seed=seed_value,
+        users=50,
+        groups=3,
+        posts=300,
+        comments=400,
+        follows=5,
+        image_ratio=0,
+        batch_size=64,
+        days=30,
+    )
+
+
+class SeedTests(PostsTestCase):
+    def snapshot(self):
+        first_user = User.objects.order_by('pk').first().pk
+        return [
+            (post.author_id - first_user, post.text, post.group is None)
+            for post in Post.objects.order_by('pk')
+        ]
+
+    def test_seed_counts_and_distributions(self):
+        inserted = seed(make_plan(1))
+        self.assertEqual(inserted['User'], User.objects.count())
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 400)
+        self.assertEqual(inserted['Follow'], Follow.objects.count())
+        created = list(
+            Post.objects.order_by('pk').values_list('created', flat=True)
+        )
+        self.assertEqual(created, sorted(created))
+        busiest = max(
+            User.objects.all(),
+            key=lambda user: user.posts.count(),
+        )
+        self.assertGreater(busiest.posts.count(), 300 / 50 * 3)
+
+    def test_same_seed_gives_same_data(self):
+        seed(make_plan(5))
+        first = self.snapshot()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seed(make_plan(5))
+        self.assertEqual(self.snapshot(), first)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        seed(make_plan(6))
+        self.assertNotEqual(self.snapshot(), first)
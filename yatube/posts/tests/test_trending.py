@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+from . import PostsTestCase
+from .. import trending
+from ..models import Comment, Post, TrendingScore, User
+
+
+class TrendingTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.user)
+        cls.old = Post.objects.create(text='Старый пост', author=cls.user)
+        cls.hot = Post.objects.create(text='Горячий пост', author=cls.user)
+
+    def comment(self, post, count=1):
+        for _ in range(count):
+            Comment.objects.create(post=post, author=self.user, text='Да')
+
+    def test_comments_update_scores_incrementally(self):
+        self.comment(self.hot, 3)
+        self.comment(self.old)
+        self.assertEqual(TrendingScore.objects.count(), 2)
+        self.assertEqual(
+            [post.pk for post in trending.top(10)],
+            [self.hot.pk, self.old.pk],
+        )
+
+    def test_recent_event_outweighs_old_ones(self):
+        now = timezone.now()
+        for _ in range(3):
+            trending.add_event(self.old.pk, now - timedelta(days=2))
+        trending.add_event(self.hot.pk, now)
+        self.assertEqual(trending.top(1)[0], self.hot)
+
+    def test_refresh_drops_posts_outside_window(self):
+        self.comment(self.hot, 2)
+        TrendingScore.objects.create(post=self.quiet, score=0)
+        self.assertEqual(trending.refresh(), 1)
+        self.assertEqual(
+            list(TrendingScore.objects.values_list('post_id', flat=True)),
+            [self.hot.pk],
+        )
+
+    def test_page_reads_top_in_one_query(self):
+        self.comment(self.hot, 2)
+        self.comment(self.old)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertTemplateUsed(response, 'posts/trending.html')
+        self.assertEqual(response.context['posts'],
+                         [self.hot, self.old])
+        with self.assertNumQueries(1):
+            trending.top(10)
+
+    def test_refresh_job_reschedules_itself(self):
+        self.comment(self.hot)
+        trending.schedule()
+        jobs.run_pending('test')
+        self.assertEqual(TrendingScore.objects.count(), 1)
+        self.assertTrue(
+            Job.objects.filter(name=trending.JOB_NAME,
+                               status=Job.PENDING).exists()
+        )
@@ -1,9 +1,10 @@
-from django.test import Client, TestCase
+from django.test import Client
 
+from . import PostsTestCase
 from ..models import Group, Post, User
 
 
-class StaticUlrTests(TestCase):
+class StaticUlrTests(PostsTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -4,9 +4,11 @@ import tempfile
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import Client, override_settings
 from django.urls import reverse
 
+from . import PostsTestCase
+from .. import follow_graph
 from ..models import Comment, Follow, Group, Post, User
 from ..forms import CommentForm, PostForm
 
@@ -14,7 +16,7 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostsPagesTests(TestCase):
+class PostsPagesTests(PostsTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -279,7 +281,41 @@ class PostsPagesTests(TestCase):
         self.assertNotEqual(posts, posts_new, 'Сбрасывание кэша не работае')
 
 
-class PaginatorTests(TestCase):
+@override_settings(POST_EXCERPT_LENGTH=20)
+class ExcerptFeedTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='long_writer')
+        cls.post = Post.objects.create(
+            text='первое второе третье четвертое пятое',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_show_excerpt_without_full_text(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', args=(self.user.username,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                post = response.context['page_obj'][0]
+                self.assertIn('text', post.get_deferred_fields())
+                self.assertContains(response, 'первое второе третье…')
+                self.assertNotContains(response, 'четвертое')
+                self.assertContains(response, 'Читать далее')
+
+    def test_post_detail_shows_full_text(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        self.assertContains(response, 'четвертое пятое')
+
+
+class PaginatorTests(PostsTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -370,7 +406,7 @@ class PaginatorTests(TestCase):
                 )
 
 
-class FollowTest(TestCase):
+class FollowTest(PostsTestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -403,6 +439,7 @@ class FollowTest(TestCase):
         }
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client1 = Client()
         self.authorized_client1.force_login(FollowTest.new_user_1)
@@ -476,3 +513,74 @@ class FollowTest(TestCase):
             FollowTest.pages['follow_index']
         )
         self.assertNotIn(new_post, response.context.get('page_obj'))
+
+
+class FollowListTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='popular_author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader_{i}')
+            for i in range(settings.FOLLOWS_ON_PAGE + 5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=cls.author) for reader in cls.readers
+        )
+        follow_graph.fill_counters(User.objects.all())
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_followers_pages_by_cursor(self):
+        url = reverse(
+            'posts:followers',
+            kwargs={'username': FollowListTests.author.username},
+        )
+        response = self.guest_client.get(url)
+        self.assertTemplateUsed(response, 'posts/follow_list.html')
+        first_page = response.context['users']
+        self.assertEqual(len(first_page), settings.FOLLOWS_ON_PAGE)
+        self.assertEqual(
+            response.context['count'],
+            len(FollowListTests.readers),
+        )
+        response = self.guest_client.get(
+            url + f'?cursor={response.context["next_cursor"]}'
+        )
+        second_page = response.context['users']
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertCountEqual(
+            first_page + second_page,
+            FollowListTests.readers,
+        )
+
+    def test_following_json(self):
+        reader = FollowListTests.readers[0]
+        response = self.guest_client.get(reverse(
+            'posts:following_json',
+            kwargs={'username': reader.username},
+        ))
+        self.assertEqual(
+            response.json(),
+            {
+                'count': 1,
+                'next_cursor': None,
+                'results': [{
+                    'username': FollowListTests.author.username,
+                    'full_name': '',
+                }],
+            },
+        )
+
+    def test_page_query_count_is_constant(self):
+        url = reverse(
+            'posts:followers_json',
+            kwargs={'username': FollowListTests.author.username},
+        )
+        self.guest_client.get(url)
+        # пользователь, счетчики, страница подписок, пользователи
+        # одним запросом
+        with self.assertNumQueries(4):
+            self.guest_client.get(url)
@@ -0,0 +1,61 @@
+import io
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from . import PostsTestCase
+from ..models import Follow, Group, Post, User
+from ..warmup import hot_urls, warmup
+
+
+class WarmupTests(PostsTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='star')
+        cls.reader = User.objects.create_user(username='fan')
+        cls.busy_group = Group.objects.create(
+            title='busy', slug='busy', description='busy group',
+        )
+        cls.quiet_group = Group.objects.create(
+            title='quiet', slug='quiet', description='quiet group',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Post.objects.bulk_create(
+            Post(text=f'post {i}', author=cls.author, group=cls.busy_group)
+            for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_hot_urls_order(self):
+        self.assertEqual(
+            hot_urls(pages=2, groups=1, profiles=1),
+            [
+                reverse('posts:index'),
+                reverse('posts:group_list', args=['busy']),
+                reverse('posts:profile', args=['star']),
+                reverse('posts:index') + '?page=2',
+                reverse('posts:group_list', args=['busy']) + '?page=2',
+                reverse('posts:profile', args=['star']) + '?page=2',
+            ],
+        )
+
+    def test_warmup_fills_index_cache(self):
+        results = warmup([reverse('posts:index')])
+        self.assertEqual(results, {reverse('posts:index'): 200})
+        Post.objects.create(text='after warmup', author=WarmupTests.author)
+        response = Client().get(reverse('posts:index'))
+        self.assertNotContains(response, 'after warmup')
+
+    def test_time_budget(self):
+        results = warmup([reverse('posts:index')], time_budget=-1)
+        self.assertEqual(results, {reverse('posts:index'): None})
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('warmup', workers=1, pages=1, stdout=out)
+        self.assertIn('Прогрето страниц: 5 из 5', out.getvalue())
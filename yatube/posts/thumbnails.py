@@ -0,0 +1,42 @@
+import threading
+import time
+
+from sorl.thumbnail.base import ThumbnailBackend
+
+from core import metrics, tracing
+
+_local = threading.local()
+
+
+class PostImageBackend(ThumbnailBackend):
+    '''
+    Take source geometry from Post.image_width and Post.image_height,
+    so a key value store miss does not open the original file
+    '''
+    def get_thumbnail(self, file_, geometry_string, **options):
+        instance = getattr(file_, 'instance', None)
+        width = getattr(instance, 'image_width', None)
+        height = getattr(instance, 'image_height', None)
+        _local.size = (width, height) if width and height else None
+        try:
+            with tracing.span('thumbnail', geometry_string):
+                return super().get_thumbnail(file_, geometry_string,
+                                             **options)
+        finally:
+            _local.size = None
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        # source регистрируется в kvstore только при промахе,
+        # с известным размером это не открывает оригинал
+        if getattr(_local, 'size', None):
+            source.set_size(_local.size)
+        return super()._get_thumbnail_filename(source, geometry_string,
+                                               options)
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        started = time.perf_counter()
+        super()._create_thumbnail(source_image, geometry_string, options,
+                                  thumbnail)
+        metrics.observe('thumbnail_generation_seconds',
+                        time.perf_counter() - started)
@@ -0,0 +1,113 @@
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+from .models import Comment, Post, TrendingScore
+
+JOB_NAME = 'posts.refresh_trending'
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def event_score(at, weight=1.0):
+    '''
+    Score of a single event in log space: log(weight) + rate * t.
+    Decay is common to all posts, so sums of exp(score) compare the same
+    at any moment and stored scores never need to be decayed
+    '''
+    return math.log(weight) + _rate() * (at - EPOCH).total_seconds()
+
+
+def log_add(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def add_event(post_id, at=None, weight=1.0):
+    '''
+    Add event to the post score with two short queries. Concurrent events
+    of one post may overwrite each other, the periodic refresh restores
+    exact scores
+    '''
+    value = event_score(at or timezone.now(), weight)
+    current = (
+        TrendingScore.objects
+        .filter(post_id=post_id)
+        .values_list('score', flat=True)
+        .first()
+    )
+    if current is None:
+        TrendingScore.objects.bulk_create(
+            [TrendingScore(post_id=post_id, score=value)],
+            ignore_conflicts=True,
+        )
+    else:
+        TrendingScore.objects.filter(post_id=post_id).update(
+            score=log_add(current, value),
+            updated=timezone.now(),
+        )
+
+
+def refresh(now=None):
+    '''
+    Rebuild scores from comments of TRENDING_WINDOW, posts without recent
+    activity drop out of the table
+    Return number of ranked posts
+    '''
+    now = now or timezone.now()
+    since = now - timedelta(seconds=settings.TRENDING_WINDOW)
+    weight = settings.TRENDING_COMMENT_WEIGHT
+    scores = {}
+    comments = (
+        Comment.objects
+        .filter(created__gt=since, created__lte=now)
+        .order_by()
+        .values_list('post_id', 'created')
+        .iterator()
+    )
+    for post_id, created in comments:
+        value = event_score(created, weight)
+        current = scores.get(post_id)
+        scores[post_id] = value if current is None else log_add(current,
+                                                                value)
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(
+            TrendingScore(post_id=post_id, score=score)
+            for post_id, score in scores.items()
+        )
+    return len(scores)
+
+
+def top(limit):
+    '''
+    Top posts with authors and without full text,
+    read by the score index in one query
+    '''
+    return list(
+        Post.objects
+        .select_related('author')
+        .filter(trending__isnull=False, author__is_active=True)
+        .defer('text', 'text_html')
+        .order_by('-trending__score')[:limit]
+    )
+
+
+def schedule(delay=0):
+    '''
+    Enqueue the next periodic refresh unless one is already waiting
+    '''
+    waiting = Job.objects.filter(
+        name=JOB_NAME,
+        status=Job.PENDING,
+    )
+    if not waiting.exists():
+        jobs.enqueue(JOB_NAME, delay=delay)
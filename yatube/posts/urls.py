@@ -11,6 +11,7 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('trending/', views.trending_posts, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -22,6 +23,7 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('digests/', views.digests, name='digests'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -31,5 +33,29 @@ urlpatterns = [
         'profile/<str:username>/unfollow/',
         views.profile_unfollow,
         name='profile_unfollow'
-    )
+    ),
+    path(
+        'profile/<str:username>/followers/',
+        views.follow_list,
+        {'relation': 'followers'},
+        name='followers',
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.follow_list,
+        {'relation': 'following'},
+        name='following',
+    ),
+    path(
+        'profile/<str:username>/followers/json/',
+        views.follow_list_json,
+        {'relation': 'followers'},
+        name='followers_json',
+    ),
+    path(
+        'profile/<str:username>/following/json/',
+        views.follow_list_json,
+        {'relation': 'following'},
+        name='following_json',
+    ),
 ]
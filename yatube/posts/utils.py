@@ -1,10 +1,44 @@
+import time
+
 from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from core import metrics
+
+
+class TimedPaginator(Paginator):
+    '''
+    Paginator which reports time of the COUNT query to metrics
+    '''
+    @cached_property
+    def count(self):
+        started = time.perf_counter()
+        count = Paginator.count.func(self)
+        metrics.observe('paginator_count_seconds',
+                        time.perf_counter() - started)
+        return count
 
 
 def page_obj(request, results, count_on_page):
     '''
     Make Paginator for DB objects and return page with result
     '''
-    paginator = Paginator(results, count_on_page)
+    paginator = TimedPaginator(results, count_on_page)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def cursor_page(request, results, count_on_page, field='id'):
+    '''
+    Keyset pagination by descending field, cursor is taken from ?cursor=
+    Return list of objects on page and cursor for the next page or None
+    '''
+    cursor = request.GET.get('cursor', '')
+    if cursor.isdigit():
+        results = results.filter(**{f'{field}__lt': int(cursor)})
+    objects = list(results.order_by(f'-{field}')[:count_on_page + 1])
+    next_cursor = None
+    if len(objects) > count_on_page:
+        objects = objects[:count_on_page]
+        next_cursor = getattr(objects[-1], field)
+    return objects, next_cursor
@@ -1,71 +1,90 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, render, redirect
 
-from .models import Follow, Group, Post
+from . import follow_graph, group_directory, images, trending
+from .models import Follow, Post
 from .forms import CommentForm, PostForm
-from .utils import page_obj
+from .utils import cursor_page, page_obj
 
 User = get_user_model()
 
 
-def index(request):
-    posts_list = (Post.objects.select_related('group', 'author'))
+def _feed_page(request, posts_list):
+    '''
+    Page of posts of active authors with authors joined and groups taken
+    from the directory, posts of users being deleted are hidden.
+    Cards show the stored excerpt, so full text and its HTML are not loaded
+    '''
+    page = page_obj(
+        request,
+        (
+            posts_list
+            .select_related('author')
+            .filter(author__is_active=True)
+            .defer('text', 'text_html')
+        ),
+        settings.POSTS_ON_PAGE,
+    )
+    page.object_list = list(page.object_list)
+    group_directory.attach(page.object_list)
+    return page
+
 
+def index(request):
     return render(request,
                   'posts/index.html',
-                  {'page_obj': page_obj(request,
-                                        posts_list,
-                                        settings.POSTS_ON_PAGE),
-                   })
+                  {'page_obj': _feed_page(request, Post.objects.all())})
+
+
+def trending_posts(request):
+    posts = trending.top(settings.TRENDING_ON_PAGE)
+    group_directory.attach(posts)
+    return render(request, 'posts/trending.html', {'posts': posts})
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts_list = (Post.objects
-                  .select_related('group', 'author')
-                  .filter(group__slug=slug))
+    group = group_directory.get_by_slug(slug)
+    if group is None:
+        raise Http404
+    posts_list = Post.objects.filter(group_id=group.id)
 
     return render(request,
                   'posts/group_list.html',
                   {'group': group,
-                   'page_obj': page_obj(request,
-                                        posts_list,
-                                        settings.POSTS_ON_PAGE),
-                   })
+                   'page_obj': _feed_page(request, posts_list)})
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts_list = (
-        Post.objects
-        .select_related('group', 'author')
-        .filter(author=author))
+    author = get_object_or_404(User, username=username, is_active=True)
+    posts_list = Post.objects.filter(author=author)
 
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=author).exists()
-    )
+    following = follow_graph.is_following(request.user.id, author.id)
+    followers_count, following_count = follow_graph.counts(author.id)
 
     return render(request,
                   'posts/profile.html',
                   {'author': author,
                    'following': following,
-                   'page_obj': page_obj(request,
-                                        posts_list,
-                                        settings.POSTS_ON_PAGE),
+                   'followers_count': followers_count,
+                   'following_count': following_count,
+                   'page_obj': _feed_page(request, posts_list),
                    })
 
 
 def post_detail(request, post_id):
-    posts = (
-        Post.objects
-        .select_related('group', 'author')
-    )
-    post = get_object_or_404(posts, id=post_id)
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             id=post_id, author__is_active=True)
+    group_directory.attach((post,))
     form = CommentForm(request.POST or None)
-    comment_list = post.comments.select_related('author')
+    comment_list = (
+        post.comments
+        .select_related('author')
+        .filter(author__is_active=True)
+    )
     return render(
         request,
         'posts/post_detail.html',
@@ -90,6 +109,7 @@ def post_create(request):
         new_post = form.save(commit=False)
         new_post.author = request.user
         new_post.save()
+        images.schedule_normalization(new_post)
         return redirect('posts:profile', username=request.user.username)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -104,6 +124,7 @@ def post_edit(request, post_id):
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
 
+    old_image = post.image.name
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -113,6 +134,11 @@ def post_edit(request, post_id):
         new_post = form.save(commit=False)
         new_post.author = request.user
         new_post.save()
+        if 'image' in form.changed_data:
+            images.schedule_normalization(new_post)
+            if old_image and old_image != new_post.image.name:
+                # замененная картинка больше не нужна посту
+                new_post.image.storage.delete(old_image)
         return redirect('posts:post_detail', post_id=post.id)
     return render(
         request,
@@ -126,7 +152,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post, id=post_id, author__is_active=True)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         new_comment = form.save(commit=False)
@@ -138,36 +164,95 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = (
-        Post.objects
-        .select_related('group', 'author')
-        .filter(author__following__user=request.user)
+    # подписки берутся из общего кэша, без JOIN с таблицей подписок
+    posts = Post.objects.filter(
+        author_id__in=list(follow_graph.followees(request.user.id))
     )
     return render(
         request,
         'posts/follow.html',
-        {
-            'page_obj': page_obj(
-                request,
-                posts,
-                settings.POSTS_ON_PAGE
-            ),
-        })
+        {'page_obj': _feed_page(request, posts)},
+    )
 
 
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(
-            user=request.user,
-            author=author,
-        )
+        try:
+            with transaction.atomic():
+                Follow.objects.create(user=request.user, author=author)
+        except IntegrityError:
+            pass
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    get_object_or_404(request.user.follower.filter(author=author)).delete()
+    deleted, _ = request.user.follower.filter(author=author).delete()
+    if not deleted:
+        raise Http404
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def digests(request):
+    return render(
+        request,
+        'posts/digests.html',
+        {
+            'page_obj': page_obj(
+                request,
+                request.user.digests.all(),
+                settings.POSTS_ON_PAGE
+            ),
+        })
+
+
+def _follow_list(request, username, relation):
+    author = get_object_or_404(User, username=username, is_active=True)
+    if relation == 'followers':
+        edges = Follow.objects.filter(author=author).only('id', 'user_id')
+        user_field = 'user_id'
+        count, _ = follow_graph.counts(author.id)
+    else:
+        edges = Follow.objects.filter(user=author).only('id', 'author_id')
+        user_field = 'author_id'
+        _, count = follow_graph.counts(author.id)
+    edges, next_cursor = cursor_page(
+        request,
+        edges,
+        settings.FOLLOWS_ON_PAGE,
+    )
+    user_ids = [getattr(edge, user_field) for edge in edges]
+    users = User.objects.in_bulk(user_ids)
+    return {
+        'author': author,
+        'relation': relation,
+        'count': count,
+        'users': [users[user_id] for user_id in user_ids],
+        'next_cursor': next_cursor,
+    }
+
+
+def follow_list(request, username, relation):
+    return render(
+        request,
+        'posts/follow_list.html',
+        _follow_list(request, username, relation),
+    )
+
+
+def follow_list_json(request, username, relation):
+    context = _follow_list(request, username, relation)
+    return JsonResponse({
+        'count': context['count'],
+        'next_cursor': context['next_cursor'],
+        'results': [
+            {
+                'username': user.username,
+                'full_name': user.get_full_name(),
+            } for user in context['users']
+        ],
+    })
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import reverse
+
+from .models import FollowCounter, Group
+
+# адрес не из INTERNAL_IPS, чтобы не рисовать debug toolbar
+REMOTE_ADDR = '192.0.2.1'
+
+
+def hot_urls(pages, groups, profiles):
+    '''
+    First pages of index, groups with most posts
+    and profiles with most followers, page 1 of every feed first
+    '''
+    slugs = list(
+        Group.objects
+        .annotate(posts_count=Count('posts'))
+        .order_by('-posts_count')
+        .values_list('slug', flat=True)[:groups]
+    )
+    usernames = list(
+        FollowCounter.objects
+        .order_by('-followers')
+        .values_list('user__username', flat=True)[:profiles]
+    )
+    feeds = [reverse('posts:index')]
+    feeds += [reverse('posts:group_list', args=[slug]) for slug in slugs]
+    feeds += [reverse('posts:profile', args=[name]) for name in usernames]
+    return [
+        f'{feed}?page={page}' if page > 1 else feed
+        for page in range(1, pages + 1)
+        for feed in feeds
+    ]
+
+
+def warmup(urls, workers=1, time_budget=None):
+    '''
+    Render urls through the full request stack to fill page, fragment
+    and thumbnail caches. Return {url: status code or None if skipped}
+    '''
+    deadline = time.monotonic() + (time_budget or float('inf'))
+    # тот же стек middleware, что у WSGIHandler, без тестового клиента
+    handler = BaseHandler()
+    handler.load_middleware()
+    factory = RequestFactory(REMOTE_ADDR=REMOTE_ADDR)
+
+    def fetch(url):
+        if time.monotonic() > deadline:
+            return url, None
+        try:
+            return url, handler.get_response(factory.get(url)).status_code
+        finally:
+            if workers > 1:
+                connections.close_all()
+
+    if workers <= 1:
+        return dict(map(fetch, urls))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(executor.map(fetch, urls))
+
+
+def warmup_in_process():
+    warmup(
+        hot_urls(
+            settings.WARMUP_PAGES,
+            settings.WARMUP_GROUPS,
+            settings.WARMUP_PROFILES,
+        ),
+        settings.WARMUP_WORKERS,
+        settings.WARMUP_TIME_BUDGET,
+    )
@@ -0,0 +1,19 @@
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from core import jobs
+
+
+@jobs.handler('users.send_mail', batch=True)
+def send_mail(payloads):
+    messages = []
+    for payload in payloads:
+        message = EmailMultiAlternatives(
+            payload['subject'],
+            payload['body'],
+            payload['from_email'],
+            [payload['to_email']],
+        )
+        if payload['html_body']:
+            message.attach_alternative(payload['html_body'], 'text/html')
+        messages.append(message)
+    get_connection().send_messages(messages)
@@ -0,0 +1,30 @@
+from django.core import mail
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from posts.models import User
+
+
+class PasswordResetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='forgetful',
+            email='forgetful@example.com',
+            password='old-password-123',
+        )
+
+    def test_reset_email_sent_from_queue(self):
+        response = Client().post(
+            reverse('users:password_reset'),
+            {'email': PasswordResetTests.user.email},
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(Job.objects.filter(name='users.send_mail').exists())
+        jobs.run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [PasswordResetTests.user.email])
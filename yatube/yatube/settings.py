@@ -45,22 +45,36 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.HealthCheckMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.TracingMiddleware',
+    'core.middleware.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# debug toolbar и его зависимости не импортируются, пока он выключен
+DEBUG_TOOLBAR = DEBUG and os.environ.get('DEBUG_TOOLBAR', '1') == '1'
+
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
+# переносит METRICS_DIR и другие рабочие каталоги во временный каталог
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
@@ -134,6 +148,14 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+STATIC_COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.map', '.ico')
+
+STATIC_CACHE_MAX_AGE = 60 * 60
+
 POSTS_ON_PAGE = 10
 
 LOGIN_URL = 'users:login'
@@ -151,11 +173,128 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
+    },
+    # общий для всех воркеров кэш, через него процессы узнают об изменениях
+    # друг друга; на нескольких серверах нужен memcached или redis
+    'shared': {
+        'BACKEND': 'core.cache.InstrumentedFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'shared_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
 }
 CROP_LEN_TEXT = 15
+# длина начала поста в лентах, полный текст только на странице поста
+POST_EXCERPT_LENGTH = 300
+# строк в одной транзакции фоновой перестройки HTML постов и комментариев
+HTML_RERENDER_BATCH_SIZE = 500
 
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+# за nginx REMOTE_ADDR у всех запросов 127.0.0.1, адрес клиента берется
+# из X-Forwarded-For. runserver без прокси: запросы с localhost без
+# заголовка внутренними не считаются, для них есть INTERNAL_TOKEN
+TRUSTED_PROXIES = [
+    '127.0.0.1',
+    '::1',
+]
+# /metrics открыт адресам INTERNAL_IPS и запросам с заголовком
+# Authorization: Bearer <INTERNAL_TOKEN>
+INTERNAL_TOKEN = os.environ.get('INTERNAL_TOKEN')
+
+FOLLOW_GRAPH_CACHE_TIMEOUT = 60 * 60 * 24
+FOLLOWS_ON_PAGE = 20
+
+IMAGE_UPLOAD_MAX_PIXELS = 50_000_000
+IMAGE_PIPELINE_MAX_SIZE = (1920, 1920)
+IMAGE_PIPELINE_FORMAT = 'JPEG'
+IMAGE_PIPELINE_QUALITY = 85
+
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.PostImageBackend'
+
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
+# python, x-accel-redirect (nginx) или x-sendfile (apache, lighttpd)
+MEDIA_SERVE_MODE = 'python'
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_PRIVATE_DIRS = ('tmp',)
+MEDIA_CACHE_MAX_AGE = 60 * 60
+MEDIA_IMMUTABLE_PATTERNS = (
+    r'^cache/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}',
+    r'^posts/[0-9a-f]{2}/[0-9a-f]{64}\.',
+)
+
+COMPRESS_MIN_SIZE = 512
+COMPRESS_LEVEL = 6
+COMPRESS_BROTLI_QUALITY = 5
+COMPRESS_CONTENT_TYPES = (
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+
+JOB_WORKERS = 2
+JOB_POLL_INTERVAL = 1.0
+JOB_BATCH_SIZE = 50
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BACKOFF = 10
+JOB_LOCK_TIMEOUT = 10 * 60
+
+DIGEST_INTERVAL = 60 * 60 * 24
+DIGEST_MAX_LOOKBACK = 60 * 60 * 24 * 7
+DIGEST_CHUNK = 500
+DIGEST_SEND_CHUNK = 100
+DIGEST_TIME_BUDGET = 30
+DIGEST_EMAIL = True
+
+WARMUP_ON_START = False
+WARMUP_PAGES = 3
+WARMUP_GROUPS = 10
+WARMUP_PROFILES = 10
+WARMUP_WORKERS = 4
+WARMUP_TIME_BUDGET = 60
+
+HEALTHZ_PATH = '/healthz'
+READYZ_PATH = '/readyz'
+
+# каталог общий для всех процессов, файлы завершившихся процессов
+# удаляет первый сброс метрик нового процесса
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_TOP = 50
+
+# доля запросов, трассы которых пишутся в TRACING_EXPORT_PATH
+TRACING_SAMPLE_RATE = 0.0
+# заголовок Server-Timing получают только внутренние запросы, как /metrics
+TRACING_SERVER_TIMING = DEBUG
+TRACING_EXPORT_PATH = os.path.join(BASE_DIR, 'traces', 'traces.jsonl')
+
+# log, raise или None
+NPLUSONE_MODE = 'log'
+NPLUSONE_THRESHOLD = 5
+
+# вес события уменьшается вдвое за TRENDING_HALF_LIFE секунд
+TRENDING_HALF_LIFE = 60 * 60 * 6
+TRENDING_WINDOW = 60 * 60 * 24 * 3
+TRENDING_REFRESH_INTERVAL = 60 * 60
+TRENDING_ON_PAGE = 20
+TRENDING_COMMENT_WEIGHT = 1.0
+
+# каталоги картинок постов, которые проверяет media_gc
+MEDIA_GC_DIRS = ('posts',)
+# более новые файлы могут принадлежать еще не сохраненному посту
+MEDIA_GC_MIN_AGE = 60 * 60
+MEDIA_GC_BATCH_SIZE = 500
+
+# объектов в одной транзакции фонового удаления пользователя
+USER_DELETION_BATCH_SIZE = 200